@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for pseudol10nutil.
+
+Measures the time taken to import the package, the throughput and latency of each transform, of
+PseudoL10nUtil.pseudolocalize() across string lengths and format specifier densities, and of
+POFileUtil.pseudolocalizefile() on generated message catalogs.  Results are written as JSON and can be compared
+against a previously saved baseline e.g.:
+
+    python bench_pseudol10nutil.py --output baseline.json
+    python bench_pseudol10nutil.py --baseline baseline.json
+"""
+
+import argparse
+import io
+import json
+import os.path
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from pseudol10nutil import POFileUtil, PseudoL10nUtil
+import pseudol10nutil.transforms
+
+
+SAMPLE_TEXT = u"The quick brown fox jumps over the lazy dog. "
+
+# Every boundary of the pad_length expansion buckets, plus a few longer strings.
+STRING_LENGTHS = [1, 10, 11, 20, 21, 30, 31, 50, 51, 70, 71, 200, 1000]
+
+# Number of format specifiers per 100 characters of text.
+FMTSPEC_DENSITIES = [0, 2, 10]
+
+FMTSPEC_STYLES = {
+    "braces": u"{}",
+    "printf_named": u"%(name)s",
+}
+
+CATALOG_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def _time(func, min_seconds):
+    """
+    Times a function, calling it enough times to run for at least min_seconds per repeat.
+
+    :returns: Tuple of (best seconds per call, number of calls per repeat).
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_seconds / 5 or number >= 1 << 24:
+            break
+        number *= 10
+    number = max(1, int(number * min_seconds / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=3, number=number))
+    return best / number, number
+
+
+def _result(seconds_per_op, units_per_op=None, unit=None):
+    result = {
+        "seconds_per_op": seconds_per_op,
+        "ops_per_sec": 1.0 / seconds_per_op if seconds_per_op else None,
+    }
+    if units_per_op is not None:
+        result["{0}_per_sec".format(unit)] = units_per_op / seconds_per_op if seconds_per_op else None
+    return result
+
+
+def _make_string(length, density, fmtspec):
+    """
+    Builds a deterministic test string of the given length with the given number of format specifiers per 100
+    characters.
+    """
+    text = (SAMPLE_TEXT * (length // len(SAMPLE_TEXT) + 1))[:length]
+    if not density:
+        return text
+    count = max(1, length * density // 100)
+    step = max(1, length // count)
+    pieces = [text[i:i + step] for i in range(0, length, step)][:count]
+    return u"".join(piece + fmtspec for piece in pieces) + text[len(u"".join(pieces)):]
+
+
+IMPORT_STATEMENTS = {
+    "baseline": "pass",
+    "package": "import pseudol10nutil",
+    "pseudol10nutil": "from pseudol10nutil import PseudoL10nUtil",
+    "pofileutil": "from pseudol10nutil import POFileUtil",
+}
+
+
+def bench_import(repeat=20):
+    """
+    Times a fresh interpreter importing the package, which is what dominates short-lived command line hooks.  The
+    baseline is an interpreter that imports nothing, so the cost of the import is the difference between the two.
+    """
+    results = {}
+    for name, statement in sorted(IMPORT_STATEMENTS.items()):
+        timings = []
+        for _ in range(repeat):
+            start = timeit.default_timer()
+            subprocess.check_call([sys.executable, "-c", statement])
+            timings.append(timeit.default_timer() - start)
+        results["import.{0}".format(name)] = _result(min(timings))
+    return results
+
+
+def bench_transforms(min_seconds):
+    results = {}
+    for name in pseudol10nutil.transforms.names():
+        func = pseudol10nutil.transforms.lookup(name)
+        seconds, _ = _time(lambda: func(SAMPLE_TEXT), min_seconds)
+        # Keyed by function name, so that results stay comparable with baselines saved before the registry existed.
+        results["transforms.{0}".format(getattr(func, "__name__", name))] = _result(seconds, len(SAMPLE_TEXT), "chars")
+    return results
+
+
+def bench_pseudolocalize(min_seconds):
+    results = {}
+    util = PseudoL10nUtil()
+    for length in STRING_LENGTHS:
+        for density in FMTSPEC_DENSITIES:
+            styles = sorted(FMTSPEC_STYLES.items()) if density else [("none", u"")]
+            for style, fmtspec in styles:
+                s = _make_string(length, density, fmtspec)
+                seconds, _ = _time(lambda: util.pseudolocalize(s), min_seconds)
+                key = "pseudolocalize.len{0}.{1}.density{2}".format(length, style, density)
+                results[key] = _result(seconds, len(s), "chars")
+    return results
+
+
+def write_catalog(filename, entries):
+    """
+    Writes a deterministic message catalog with the given number of entries, mixing plain strings, format strings,
+    plural forms and contexts.
+    """
+    with io.open(filename, mode="w", encoding="UTF-8", newline="\n") as fileobj:
+        fileobj.write(u'msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n'
+                      u'"Plural-Forms: nplurals=2; plural=(n != 1);\\n"\n')
+        for idx in range(entries):
+            fileobj.write(u"\n#: src/module{0}.py:{1}\n".format(idx % 97, idx))
+            if idx % 11 == 0:
+                fileobj.write(u'msgctxt "context {0}"\n'.format(idx % 13))
+            if idx % 5 == 0:
+                fileobj.write(u'msgid "%(count)d file in folder {0}"\n'
+                              u'msgid_plural "%(count)d files in folder {0}"\n'
+                              u'msgstr[0] ""\nmsgstr[1] ""\n'.format(idx))
+            else:
+                fileobj.write(u'msgid "String {0}: The quick brown {{animal}} jumps over the lazy dog."\n'
+                              u'msgstr ""\n'.format(idx))
+
+
+def bench_pseudolocalizefile(max_entries, min_seconds):
+    results = {}
+    pofileutil = POFileUtil()
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for entries in CATALOG_SIZES:
+            if entries > max_entries:
+                continue
+            input_file = os.path.join(temp_dir, "bench{0}.pot".format(entries))
+            output_file = os.path.join(temp_dir, "bench{0}.po".format(entries))
+            write_catalog(input_file, entries)
+            size = os.path.getsize(input_file)
+            for bulk_io in (False, True):
+                # Large catalogs take long enough that a single run per repeat is representative.
+                timings = []
+                for _ in range(3 if entries < 1000000 else 1):
+                    start = timeit.default_timer()
+                    pofileutil.pseudolocalizefile(input_file, output_file, bulk_io=bulk_io)
+                    timings.append(timeit.default_timer() - start)
+                    if sum(timings) >= min_seconds * 10:
+                        break
+                seconds = min(timings)
+                key = "pseudolocalizefile.entries{0}{1}".format(entries, ".bulk_io" if bulk_io else "")
+                result = _result(seconds, entries, "entries")
+                result["bytes_per_sec"] = size / seconds if seconds else None
+                results[key] = result
+            os.remove(input_file)
+            os.remove(output_file)
+    finally:
+        shutil.rmtree(temp_dir)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints a comparison of the results against a baseline.
+
+    :returns: List of the names of the benchmarks that are slower than the baseline by more than threshold.
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old = baseline[name]["seconds_per_op"]
+        new = results[name]["seconds_per_op"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  improved"
+        sys.stdout.write("{0:60s} {1:12.3e}s {2:12.3e}s {3:+8.1%}{4}\n".format(name, old, new, change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write the results as JSON to this file instead of stdout.")
+    parser.add_argument("--baseline", help="Compare the results against a JSON file from a previous run.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default: 0.10).")
+    parser.add_argument("--max-entries", type=int, default=100000,
+                        help="Largest generated catalog to benchmark, up to 1000000 (default: 100000).")
+    parser.add_argument("--min-seconds", type=float, default=0.2,
+                        help="Minimum time to spend per measurement (default: 0.2).")
+    parser.add_argument("--only", choices=["import", "transforms", "pseudolocalize", "pseudolocalizefile"],
+                        help="Only run one group of benchmarks.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.only in (None, "import"):
+        results.update(bench_import())
+    if args.only in (None, "transforms"):
+        results.update(bench_transforms(args.min_seconds))
+    if args.only in (None, "pseudolocalize"):
+        results.update(bench_pseudolocalize(args.min_seconds))
+    if args.only in (None, "pseudolocalizefile"):
+        results.update(bench_pseudolocalizefile(args.max_entries, args.min_seconds))
+    report = {
+        "meta": {
+            "python": sys.version,
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    data = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with io.open(args.output, mode="w", encoding="UTF-8") as fileobj:
+            fileobj.write(u"{0}\n".format(data))
+    elif not args.baseline:
+        sys.stdout.write(data + "\n")
+    if args.baseline:
+        with io.open(args.baseline, mode="r", encoding="UTF-8") as fileobj:
+            baseline = json.load(fileobj)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
-from flask import Flask, jsonify, make_response, redirect, render_template, request
+import json
+
+from flask import Flask, Response, jsonify, make_response, redirect, render_template, request, stream_with_context
 
 from pseudol10nutil import PseudoL10nUtil
 import pseudol10nutil.transforms as xforms
@@ -10,7 +12,43 @@ appname = "pseudol10nutil"
 api_version = "v1.0"
 api_base_url = "/{0}/api/{1}/".format(appname, api_version)
 ui_base_url = "/{0}/".format(appname)
-util = PseudoL10nUtil()
+# Compiled pipelines are immutable, so one instance serves every request thread.
+pipeline = PseudoL10nUtil().compile()
+
+substitutions = {
+    "diacritics": xforms.transliterate_diacritic,
+    "fullwidth": xforms.transliterate_fullwidth,
+    "circled": xforms.transliterate_circled,
+}
+bracket_styles = {
+    "square": xforms.square_brackets,
+    "angle": xforms.angle_brackets,
+    "curly": xforms.curly_brackets,
+}
+
+
+def build_pipelines():
+    """
+    Compiles a pipeline for every combination of the options in the web UI, keyed by (substitution type, pad length,
+    bracket style).  Like the default pipeline, they are immutable and shared by all request threads without any
+    locking.
+    """
+    result = {}
+    for substitute in [None] + sorted(substitutions):
+        for pad_length in (False, True):
+            for brackets in [None] + sorted(bracket_styles):
+                transforms = []
+                if substitute is not None:
+                    transforms.append(substitutions[substitute])
+                if pad_length:
+                    transforms.append(xforms.pad_length)
+                if brackets is not None:
+                    transforms.append(bracket_styles[brackets])
+                result[(substitute, pad_length, brackets)] = pipeline.with_transforms(transforms)
+    return result
+
+
+pipelines = build_pipelines()
 
 
 @app.errorhandler(404)
@@ -27,12 +65,32 @@ def do_pseudo():
         data = request.json["strings"]
     else:
         return make_response(jsonify({"error": "400 Error: Could not process request."}), 400)
-    for k, v in data.items():
-        data[k] = util.pseudolocalize(v)
-    result = {"strings": data}
+    result = {"strings": pipeline.pseudolocalize_many(data)}
     return jsonify(result)
 
 
+@app.route(api_base_url + "pseudo/stream", methods=["POST"])
+def do_pseudo_stream():
+    """
+    Streaming variant of do_pseudo() for large resource bundles.  The request body is newline-delimited JSON with
+    one {"key": ..., "string": ...} record per line, and the response is a chunked stream of the same records with
+    the strings pseudo-localized.  Records are read and written one at a time, so memory use does not depend on the
+    size of the bundle.  A line that cannot be processed produces an {"line": ..., "error": ...} record.
+    """
+    def generate():
+        for line_number, line in enumerate(request.stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line.decode("UTF-8"))
+                record["string"] = pipeline(record["string"])
+            except (ValueError, KeyError, TypeError):
+                record = {"line": line_number, "error": "400 Error: Could not process record."}
+            yield json.dumps(record, ensure_ascii=False).encode("UTF-8") + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/")
 def home():
     return redirect(ui_base_url)
@@ -46,39 +104,18 @@ def do_pseudo_ui():
         brackets = request.form.get("add_brackets")
         pad_length = True if "pad_length" in request.form else False
 
-        transforms = []
-        form_options = {}  # Preserve options on post back
-
-        if substitute == "diacritics":
-            transforms.append(xforms.transliterate_diacritic)
-            form_options['sub_diacritics'] = 'checked'
-        elif substitute == "fullwidth":
-            transforms.append(xforms.transliterate_fullwidth)
-            form_options['sub_fullwidth'] = 'checked'
-        elif substitute == "circled":
-            transforms.append(xforms.transliterate_circled)
-            form_options['sub_circled'] = 'checked'
-        else:
-            form_options['sub_none'] = 'checked'
+        if substitute not in substitutions:
+            substitute = None
+        if brackets not in bracket_styles:
+            brackets = None
 
+        form_options = {}  # Preserve options on post back
+        form_options['sub_{0}'.format(substitute or 'none')] = 'checked'
+        form_options['brackets_{0}'.format(brackets or 'none')] = 'checked'
         if pad_length:
-            transforms.append(xforms.pad_length)
             form_options['do_pad_length'] = 'checked'
 
-        if brackets == "square":
-            transforms.append(xforms.square_brackets)
-            form_options['brackets_square'] = 'checked'
-        elif brackets == "angle":
-            transforms.append(xforms.angle_brackets)
-            form_options['brackets_angle'] = 'checked'
-        elif brackets == "curly":
-            transforms.append(xforms.curly_brackets)
-            form_options['brackets_curly'] = 'checked'
-        else:
-            form_options['brackets_none'] = 'checked'
-
-        util.transforms = transforms
-        pseudolocalized_text_output = util.pseudolocalize(input_text)
+        pseudolocalized_text_output = pipelines[(substitute, pad_length, brackets)](input_text)
         return render_template("pseudolocalize_template.html",
                                pseudolocalized_text_input=input_text,
                                pseudolocalized_text_output=pseudolocalized_text_output,
@@ -93,4 +130,4 @@ def do_pseudo_ui():
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", debug=True)
+    app.run(host="0.0.0.0", debug=True, threaded=True)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+asyncio (ASGI) version of the REST endpoint of app.py.
+
+Strings from requests that arrive at about the same time are collected into micro-batches and pseudo-localized with
+a single call to pseudolocalize_many(), so each distinct string is only processed once per batch.  Large batches are
+offloaded to a pool of worker processes so that the event loop stays responsive.  Run with any ASGI server e.g.:
+
+    uvicorn asgi_app:app --port 5000
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+
+from pseudol10nutil import PseudoL10nUtil
+
+appname = "pseudol10nutil"
+api_version = "v1.0"
+api_base_url = "/{0}/api/{1}/".format(appname, api_version)
+
+# How long to wait for more requests before processing a batch, and how many strings a batch may hold.
+batch_delay = float(os.environ.get("PSEUDOL10N_BATCH_DELAY", "0.002"))
+batch_max_strings = int(os.environ.get("PSEUDOL10N_BATCH_MAX_STRINGS", "10000"))
+# Batches with fewer characters than this are cheap enough to process on the event loop itself.
+offload_min_chars = int(os.environ.get("PSEUDOL10N_OFFLOAD_MIN_CHARS", "20000"))
+
+util = PseudoL10nUtil()
+
+
+def _pseudolocalize_batch(strings):
+    # Runs in the worker processes, which each have their own copy of the module-level util.
+    return util.pseudolocalize_many(strings)
+
+
+class MicroBatcher:
+    """
+    Collects the strings of concurrent requests into batches.
+    """
+
+    def __init__(self, executor=None, delay=batch_delay, max_strings=batch_max_strings,
+                 min_chars=offload_min_chars):
+        """
+        Initializer for class.
+
+        :param executor: Optional concurrent.futures executor to run large batches in.  If not specified, a process
+                         pool with one worker per CPU is used.
+        :param delay: Seconds to wait for more requests after the first one of a batch arrives.
+        :param max_strings: Maximum number of strings in a batch.
+        :param min_chars: Batches with at least this many characters are run in the executor.
+        """
+        self.executor = executor
+        self.delay = delay
+        self.max_strings = max_strings
+        self.min_chars = min_chars
+        self._queue = None
+        self._task = None
+
+    async def submit(self, strings):
+        """
+        Pseudo-localizes a list of strings as part of the next batch.
+
+        :param strings: List of strings.
+        :returns: List of pseudo-localized strings, in the same order.
+        """
+        if self._task is None:
+            # Created lazily so that they belong to the event loop that the server runs.
+            self._queue = asyncio.Queue()
+            self._task = asyncio.ensure_future(self._run())
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((strings, future))
+        return await future
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        count = len(batch[0][0])
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.delay
+        while count < self.max_strings:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            count += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = await self._next_batch()
+            strings = [s for request_strings, _ in batch for s in request_strings]
+            try:
+                if sum(len(s) for s in strings) >= self.min_chars:
+                    if self.executor is None:
+                        self.executor = concurrent.futures.ProcessPoolExecutor()
+                    results = await loop.run_in_executor(self.executor, _pseudolocalize_batch, strings)
+                else:
+                    results = util.pseudolocalize_many(strings)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            start = 0
+            for request_strings, future in batch:
+                end = start + len(request_strings)
+                if not future.done():  # The client may have gone away.
+                    future.set_result(results[start:end])
+                start = end
+
+
+batcher = MicroBatcher()
+
+
+async def _read_body(receive):
+    body = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        body.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(body)
+
+
+async def _send_json(send, status, data):
+    body = json.dumps(data).encode("UTF-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def do_pseudo(receive, send):
+    try:
+        data = json.loads((await _read_body(receive)).decode("UTF-8"))["strings"]
+    except (ValueError, KeyError, TypeError):
+        return await _send_json(send, 400, {"error": "400 Error: Could not process request."})
+    keys = list(data) if isinstance(data, dict) else None
+    strings = [data[k] for k in keys] if keys is not None else data
+    # Checked up front so that one bad request cannot fail the whole batch it would be part of.
+    if not isinstance(strings, list) or not all(isinstance(s, str) for s in strings):
+        return await _send_json(send, 400, {"error": "400 Error: Could not process request."})
+    results = await batcher.submit(strings)
+    result = dict(zip(keys, results)) if keys is not None else results
+    await _send_json(send, 200, {"strings": result})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if batcher.executor is not None:
+                    batcher.executor.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+    if scope["path"] == api_base_url + "pseudo" and scope["method"] == "POST":
+        return await do_pseudo(receive, send)
+    await _send_json(send, 404, {"error": "404 Error: URL not found.  Please check your spelling and try again."})
@@ -1,7 +1,9 @@
+import json
 import unittest
 
 import requests
 
+import app
 from pseudol10nutil import PseudoL10nUtil
 
 
@@ -30,5 +32,43 @@ class TestPseudoL10nUtil(unittest.TestCase):
             self.assertEqual(self.util.pseudolocalize(data[k]), v)
 
 
+class TestPseudoStream(unittest.TestCase):
+
+    def setUp(self):
+        self.util = PseudoL10nUtil()
+        self.client = app.app.test_client()
+
+    def post(self, body):
+        resp = self.client.post(app.api_base_url + "pseudo/stream", data=body, content_type="application/x-ndjson")
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual("application/x-ndjson", resp.mimetype)
+        return [json.loads(line) for line in resp.get_data().decode("UTF-8").splitlines()]
+
+    def test_pseudo_stream(self):
+        records = [
+            {"key": "key1", "string": u"The quick brown fox jumps over the lazy dog."},
+            {"key": "key2", "string": u"The quick brown {animal1} jumps over the lazy {animal2}."},
+        ]
+        body = u"".join(json.dumps(record) + u"\n" for record in records).encode("UTF-8")
+        self.assertEqual([{"key": record["key"], "string": self.util.pseudolocalize(record["string"])}
+                          for record in records], self.post(body))
+
+    def test_pseudo_stream_errors(self):
+        # A bad line produces an error record, and the records after it are still processed.  Blank lines are
+        # skipped, but still counted in the line numbers.
+        body = b'{"key": "a", "string": "OK"}\n\n{"key": "b", "string": \n{"key": "c"}\n  \n' \
+               b'{"key": "d", "string": "Cancel"}'
+        self.assertEqual([
+            {"key": "a", "string": self.util.pseudolocalize(u"OK")},
+            {"line": 3, "error": "400 Error: Could not process record."},
+            {"line": 4, "error": "400 Error: Could not process record."},
+            {"key": "d", "string": self.util.pseudolocalize(u"Cancel")},
+        ], self.post(body))
+
+    def test_pseudo_stream_empty(self):
+        self.assertEqual([], self.post(b""))
+        self.assertEqual([], self.post(b"\n\r\n\n"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import concurrent.futures
+import json
+import unittest
+from unittest import mock
+
+import asgi_app
+
+
+class TestASGIApp(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # A fresh batcher for each test, since its queue and task belong to the event loop they were created in.
+        self.batcher = asgi_app.MicroBatcher(delay=0.05)
+        patcher = mock.patch.object(asgi_app, "batcher", self.batcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        if self.batcher._task is not None:
+            self.batcher._task.cancel()
+            self.loop.run_until_complete(asyncio.gather(self.batcher._task, return_exceptions=True))
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    async def request(self, path, body, method="POST"):
+        # The body is sent in two parts, as a server may do for large requests.
+        messages = [
+            {"type": "http.request", "body": body[:5], "more_body": True},
+            {"type": "http.request", "body": body[5:], "more_body": False},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "path": asgi_app.api_base_url + path, "method": method}
+        await asgi_app.app(scope, receive, send)
+        self.assertEqual(["http.response.start", "http.response.body"], [message["type"] for message in sent])
+        return sent[0]["status"], json.loads(sent[1]["body"].decode("UTF-8"))
+
+    def post(self, strings):
+        return self.request("pseudo", json.dumps({"strings": strings}).encode("UTF-8"))
+
+    def test_pseudo_batched(self):
+        requests = [
+            {"key1": u"The quick brown fox jumps over the lazy dog.", "key2": u"Hello {name}!"},
+            [u"Hello {name}!", u"%d files"],
+            [],
+        ]
+        with mock.patch.object(asgi_app.util, "pseudolocalize_many",
+                               wraps=asgi_app.util.pseudolocalize_many) as pseudolocalize_many:
+            responses = self.loop.run_until_complete(asyncio.gather(*[self.post(strings) for strings in requests]))
+        # The concurrent requests are pseudo-localized together, in the order they arrived.
+        pseudolocalize_many.assert_called_once_with([
+            u"The quick brown fox jumps over the lazy dog.", u"Hello {name}!", u"Hello {name}!", u"%d files"])
+        pseudolocalize = asgi_app.util.pseudolocalize
+        self.assertEqual([
+            (200, {"strings": dict((k, pseudolocalize(v)) for k, v in requests[0].items())}),
+            (200, {"strings": [pseudolocalize(s) for s in requests[1]]}),
+            (200, {"strings": []}),
+        ], responses)
+
+    def test_pseudo_offloaded(self):
+        self.batcher.executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.addCleanup(self.batcher.executor.shutdown)
+        self.batcher.min_chars = 0
+        status, data = self.loop.run_until_complete(self.post([u"Hello", u"World"]))
+        self.assertEqual(200, status)
+        self.assertEqual([asgi_app.util.pseudolocalize(u"Hello"), asgi_app.util.pseudolocalize(u"World")],
+                         data["strings"])
+
+    def test_bad_request(self):
+        for body in [b"not json", b'{"text": "Hello"}', b'{"strings": [1, 2]}']:
+            status, data = self.loop.run_until_complete(self.request("pseudo", body))
+            self.assertEqual(400, status)
+        # Rejected requests never reach the batcher.
+        self.assertIsNone(self.batcher._task)
+
+    def test_not_found(self):
+        status, _ = self.loop.run_until_complete(self.request("bogus", b""))
+        self.assertEqual(404, status)
+        status, _ = self.loop.run_until_complete(self.request("pseudo", b"", method="GET"))
+        self.assertEqual(404, status)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,36 @@
-try:
-    from pseudol10nutil import POFileUtil, PseudoL10nUtil
-except ImportError:
-    from .pseudol10nutil import POFileUtil, PseudoL10nUtil
+import sys
 
-__all__ = ["POFileUtil", "PseudoL10nUtil"]
+__all__ = ["CompiledPipeline", "PipelineStats", "POFileUtil", "PseudoL10nUtil", "PseudoTranslations", "XLIFFFileUtil"]
+
+# Module that defines each of the public classes.  On Python 3.7+ the modules are only imported when one of their
+# classes is first accessed, which keeps 'import pseudol10nutil' cheap for short-lived processes.
+_exports = {
+    "CompiledPipeline": "pseudol10nutil",
+    "PipelineStats": "pseudol10nutil",
+    "POFileUtil": "pseudol10nutil",
+    "PseudoL10nUtil": "pseudol10nutil",
+    "PseudoTranslations": "translations",
+    "XLIFFFileUtil": "pseudol10nutil",
+}
+
+if sys.version_info >= (3, 7):
+    import importlib
+
+    def __getattr__(name):
+        try:
+            module = _exports[name]
+        except KeyError:
+            raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+        value = getattr(importlib.import_module("." + module, __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+else:
+    try:
+        from pseudol10nutil import CompiledPipeline, PipelineStats, POFileUtil, PseudoL10nUtil, XLIFFFileUtil
+        from translations import PseudoTranslations
+    except ImportError:
+        from .pseudol10nutil import CompiledPipeline, PipelineStats, POFileUtil, PseudoL10nUtil, XLIFFFileUtil
+        from .translations import PseudoTranslations
@@ -0,0 +1,29 @@
+import importlib
+
+
+class LazyModule(object):
+    """
+    Stand-in for a module that is only imported when one of its attributes is first accessed, for modules that are
+    expensive to import and only needed by some code paths.
+    """
+
+    def __init__(self, name, package=None):
+        """
+        Initializer for class.
+
+        :param name: Name of the module, which may be relative to package e.g. '.mo'.
+        :param package: Optional package that a relative name is resolved against.
+        """
+        self._name = name
+        self._package = package
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Only called for attributes that are not set on the instance i.e. those of the module.
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name, self._package)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return "<lazy module {0!r}>".format(self._name)
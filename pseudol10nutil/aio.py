@@ -0,0 +1,206 @@
+import asyncio
+import concurrent.futures
+import io
+import os.path
+import timeit
+
+from . import po
+from .pseudol10nutil import FileResult, POFileUtil
+
+# Number of entries read, pseudo-localized and written by each call on the executor.  The event loop gets control
+# back between calls, which is also when a cancelled file stops.
+_chunk_entries = 1000
+
+
+class _FileJob(object):
+    """
+    Open files and position of one message catalog being pseudo-localized.
+    """
+
+    def __init__(self, in_fileobj, out_fileobj, output_filename):
+        self.in_fileobj = in_fileobj
+        self.out_fileobj = out_fileobj
+        self.entries = po.parse(in_fileobj)
+        self.output_filename = output_filename
+
+    def close(self):
+        try:
+            self.in_fileobj.close()
+        finally:
+            self.out_fileobj.close()
+
+
+class AsyncPOFileUtil(object):
+    """
+    asyncio counterpart of POFileUtil, for applications that run an event loop.  The files are read, pseudo-localized
+    and written a chunk of entries at a time on a bounded executor, so the event loop is never blocked, and a limit
+    on the number of catalogs processed at once keeps a large batch from flooding the executor::
+
+        util = AsyncPOFileUtil(concurrency=4)
+        results = await util.pseudolocalizefiles([("en.pot", "eo.po"), ("app.pot", "app-eo.po")])
+
+    Cancelling the task that awaits pseudolocalizefile() stops that catalog after the chunk in progress, and removes
+    its partially written output.
+    """
+
+    def __init__(self, l10nutil=None, concurrency=None, executor=None):
+        """
+        Initializer for class.
+
+        :param l10nutil: Optional instance of PseudoL10nUtil object, as for POFileUtil.
+        :param concurrency: Optional maximum number of catalogs to process at once.  Defaults to the number of
+                            workers of the executor that is created if executor is not specified, or 4 otherwise.
+        :param executor: Optional concurrent.futures.ThreadPoolExecutor to run the blocking work on.  If not
+                         specified, an executor with one thread per CPU is created, and shut down by close().
+        """
+        self.pofileutil = POFileUtil(l10nutil)
+        self._owns_executor = executor is None
+        if executor is None:
+            workers = concurrency or os.cpu_count() or 1
+            executor = concurrent.futures.ThreadPoolExecutor(workers)
+            concurrency = concurrency or workers
+        self._executor = executor
+        self.concurrency = concurrency or 4
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    @property
+    def l10nutil(self):
+        """
+        PseudoL10nUtil object used to pseudo-localize the messages.
+        """
+        return self.pofileutil.l10nutil
+
+    def close(self):
+        """
+        Shuts down the executor, if it was created by this object.  Waits for any work in progress to finish.
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    def _limit(self):
+        # The semaphore belongs to the event loop it was created in, so a new one is made for each loop.
+        loop = asyncio.get_event_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def pseudolocalizefile(self, input_filename, output_filename, input_encoding='UTF-8',
+                                 output_encoding='UTF-8', overwrite_existing=True):
+        """
+        Coroutine that pseudo-localizes a message catalog file.  The output is the same as that of
+        POFileUtil.pseudolocalizefile().
+
+        :param input_filename: Filename of the source (input) message catalog file.
+        :param output_filename: Filename of the target (output) message catalog file.
+        :param input_encoding: String indicating the encoding of the input file.  Optional, defaults to 'UTF-8'.
+        :param output_encoding: String indicating the encoding of the output file.  Optional, defaults to 'UTF-8'.
+        :param overwrite_existing: Boolean indicating if an existing output message catalog file should be overwritten.
+                                   True by default. If False, an IOError will be raised.
+        :raises asyncio.CancelledError: If the task is cancelled.  The partially written output file is removed.
+        """
+        async with self._limit():
+            await self._pseudolocalizefile(input_filename, output_filename, input_encoding, output_encoding,
+                                           overwrite_existing)
+
+    async def _pseudolocalizefile(self, input_filename, output_filename, input_encoding, output_encoding,
+                                  overwrite_existing):
+        job = None
+        pending = self._executor.submit(_open_job, input_filename, output_filename, input_encoding, output_encoding,
+                                        overwrite_existing)
+        try:
+            job = await asyncio.wrap_future(pending)
+            while True:
+                pending = self._executor.submit(self._pseudolocalize_chunk, job)
+                if await asyncio.wrap_future(pending):
+                    break
+        except BaseException as e:
+            # Work that is already running cannot be interrupted, so the files are only closed once it has finished.
+            # Shielded, so that the clean up still completes if the task is cancelled again.
+            pending.cancel()
+            discard = isinstance(e, asyncio.CancelledError)
+            await asyncio.shield(asyncio.wrap_future(self._executor.submit(_abandon_job, job, pending, discard)))
+            raise
+        await asyncio.wrap_future(self._executor.submit(job.close))
+
+    def _pseudolocalize_chunk(self, job):
+        """
+        Pseudo-localizes and writes the next chunk of entries.
+
+        :returns: True if the end of the input has been reached.
+        """
+        parts = []
+        for entry in job.entries:
+            parts.append(entry.format(self.pofileutil.pseudolocalizeentry(entry)))
+            if len(parts) >= _chunk_entries:
+                job.out_fileobj.write(u"".join(parts))
+                return False
+        job.out_fileobj.write(u"".join(parts))
+        return True
+
+    async def pseudolocalizefiles(self, files, input_encoding='UTF-8', output_encoding='UTF-8',
+                                  overwrite_existing=True):
+        """
+        Coroutine that pseudo-localizes several message catalog files concurrently, up to the concurrency limit at
+        a time.  A failure in one catalog is reported in the results and does not stop the others from being
+        processed.
+
+        :param files: Iterable of (input_filename, output_filename) tuples.
+        :param input_encoding: String indicating the encoding of the input files.  Optional, defaults to 'UTF-8'.
+        :param output_encoding: String indicating the encoding of the output files.  Optional, defaults to 'UTF-8'.
+        :param overwrite_existing: Boolean indicating if existing output message catalog files should be
+                                   overwritten.  True by default.  If False, those files are reported as failures.
+        :returns: List of FileResult named tuples (input_filename, output_filename, seconds, error), in the same
+                  order as files.  error is None if the catalog was processed successfully.
+        """
+        async def run(input_filename, output_filename):
+            async with self._limit():
+                # Timed once running, so that the time spent waiting for the other catalogs is not included.
+                start = timeit.default_timer()
+                error = None
+                try:
+                    await self._pseudolocalizefile(input_filename, output_filename, input_encoding, output_encoding,
+                                                   overwrite_existing)
+                except asyncio.CancelledError:  # An Exception before Python 3.8.
+                    raise
+                except Exception as e:
+                    error = "{0}: {1}".format(type(e).__name__, e)
+                return FileResult(input_filename, output_filename, timeit.default_timer() - start, error)
+
+        return await asyncio.gather(*[run(input_filename, output_filename)
+                                      for input_filename, output_filename in files])
+
+
+def _open_job(input_filename, output_filename, input_encoding, output_encoding, overwrite_existing):
+    if not os.path.isfile(input_filename):
+        raise IOError("Input message catalog not found: {0}".format(os.path.abspath(input_filename)))
+    if os.path.isfile(output_filename) and not overwrite_existing:
+        raise IOError("Error, output message catalog already exists: {0}".format(os.path.abspath(output_filename)))
+    in_fileobj = io.open(input_filename, mode="r", encoding=input_encoding, newline="\n")
+    try:
+        out_fileobj = io.open(output_filename, mode="w", encoding=output_encoding, newline="\n")
+    except BaseException:
+        in_fileobj.close()
+        raise
+    return _FileJob(in_fileobj, out_fileobj, output_filename)
+
+
+def _abandon_job(job, pending, discard):
+    """
+    Closes the files of a catalog that failed or was cancelled.
+
+    :param job: _FileJob object, or None if the files were still being opened.
+    :param pending: Future of the last call made on the executor for the catalog.
+    :param discard: Boolean indicating if the partially written output file should be removed.
+    """
+    # The future was either cancelled before it started, or is running on another thread, so this never waits on
+    # queued work.
+    concurrent.futures.wait([pending])
+    if job is None:
+        if pending.cancelled() or pending.exception() is not None:
+            return
+        job = pending.result()
+    job.close()
+    if discard and os.path.isfile(job.output_filename):
+        os.remove(job.output_filename)
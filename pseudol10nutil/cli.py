@@ -0,0 +1,147 @@
+import argparse
+import io
+import sys
+import timeit
+
+from . import placeholders, transforms
+from .pseudol10nutil import PipelineStats, POFileUtil, PseudoL10nUtil
+
+
+_default_transforms = "diacritic,pad,square"
+
+
+def _names_list(lookup):
+    def parse(value):
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        for name in names:
+            try:
+                lookup(name)
+            except ValueError as e:
+                raise argparse.ArgumentTypeError(str(e))
+        return names
+    return parse
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="pseudol10n",
+        description="Pseudo-localize gettext message catalogs, or text or a message catalog read from stdin.")
+    parser.add_argument("input_paths", metavar="PATH", nargs="*",
+                        help="Directory to search for .po and .pot files (e.g. locales/), or message catalog file.  "
+                             "With no paths (or '-'), read from stdin and write to stdout.")
+    parser.add_argument("-o", "--output", dest="output_root",
+                        help="Directory to write the pseudo-localized message catalogs to.  Required with PATH.")
+    parser.add_argument("-l", "--locale",
+                        help="Write .pot templates to OUTPUT/LOCALE/LC_MESSAGES/<domain>.po.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes.  Defaults to the number of CPUs.")
+    parser.add_argument("-t", "--transforms", type=_names_list(transforms.lookup), default=_default_transforms,
+                        help="Comma separated names of the transforms to apply, in order "
+                             "(default: {0}).".format(_default_transforms))
+    parser.add_argument("--list-transforms", action="store_true", help="List the names of the transforms and exit.")
+    parser.add_argument("-p", "--placeholders", type=_names_list(placeholders.lookup), default=None,
+                        help="Comma separated names of the placeholder grammars to leave alone, most specific first "
+                             "(default: {0}).".format(",".join(placeholders.default)))
+    parser.add_argument("--list-placeholders", action="store_true",
+                        help="List the names of the placeholder grammars and exit.")
+    parser.add_argument("-f", "--format", choices=["text", "po"], default="text",
+                        help="Format of stdin: 'text' pseudo-localizes each line, 'po' a message catalog "
+                             "(default: text).")
+    parser.add_argument("--input-encoding", default="UTF-8", help="Encoding of the input files.")
+    parser.add_argument("--output-encoding", default="UTF-8", help="Encoding of the output files.")
+    parser.add_argument("--no-overwrite", dest="overwrite_existing", action="store_false",
+                        help="Fail instead of overwriting existing output files.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep a manifest next to each output file and skip work that has not changed.")
+    parser.add_argument("--bulk-io", action="store_true",
+                        help="Memory-map the input files and copy comments through without decoding them.")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print timing statistics on stderr at the end, including the time spent in each "
+                             "transform when running in a single process.")
+    return parser
+
+
+def _pseudolocalize_lines(util, in_fileobj, out_fileobj):
+    count = 0
+    for line in in_fileobj:
+        text = line.rstrip(u"\r\n")
+        out_fileobj.write(util.pseudolocalize(text) + line[len(text):])
+        count += 1
+    return count
+
+
+def _pseudolocalize_stdin(args, util):
+    # Work on the underlying file descriptors, so the encodings are the ones given on the command line and line
+    # endings pass through unchanged.
+    in_fileobj = io.open(sys.stdin.fileno(), mode="r", encoding=args.input_encoding, newline="\n", closefd=False)
+    out_fileobj = io.open(sys.stdout.fileno(), mode="w", encoding=args.output_encoding, newline="\n", closefd=False)
+    try:
+        if args.format == "po":
+            return POFileUtil(util).pseudolocalizestream(in_fileobj, out_fileobj), "entries"
+        return _pseudolocalize_lines(util, in_fileobj, out_fileobj), "line(s)"
+    finally:
+        out_fileobj.flush()
+
+
+def _write_stage_stats(stats):
+    snapshot = stats.snapshot()
+    if not snapshot:
+        return
+    sys.stderr.write("{0:50s} {1:>10s} {2:>10s} {3:>12s} {4:>12s}\n".format(
+        "stage", "calls", "seconds", "chars in", "chars out"))
+    for name, stage in sorted(snapshot.items(), key=lambda item: -item[1].seconds):
+        sys.stderr.write("{0:50s} {1:10d} {2:10.3f} {3:12d} {4:12d}\n".format(
+            name, stage.calls, stage.seconds, stage.chars_in, stage.chars_out))
+
+
+def main(argv=None):
+    """
+    Entry point for the command line interface.  Each message catalog is reported with its timing on stderr.
+
+    :param argv: Optional list of command line arguments.  Defaults to sys.argv[1:].
+    :returns: Exit status; 0 if every catalog was processed successfully, otherwise 1.
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.list_transforms:
+        sys.stdout.write("\n".join(transforms.names()) + "\n")
+        return 0
+    if args.list_placeholders:
+        sys.stdout.write("\n".join(placeholders.names()) + "\n")
+        return 0
+    stats = PipelineStats() if args.stats else None
+    util = PseudoL10nUtil(args.transforms, observer=stats, placeholder_grammars=args.placeholders)
+    start = timeit.default_timer()
+    if not args.input_paths or args.input_paths == ["-"]:
+        count, unit = _pseudolocalize_stdin(args, util)
+        if args.stats:
+            sys.stderr.write("{0} {1}, {2:.3f}s total\n".format(count, unit, timeit.default_timer() - start))
+            _write_stage_stats(stats)
+        return 0
+    if "-" in args.input_paths:
+        parser.error("stdin ('-') cannot be combined with other paths")
+    if not args.output_root:
+        parser.error("the following arguments are required with PATH: -o/--output")
+    results = POFileUtil(util).pseudolocalizetree(args.input_paths, args.output_root, locale=args.locale,
+                                                  workers=args.jobs, input_encoding=args.input_encoding,
+                                                  output_encoding=args.output_encoding,
+                                                  overwrite_existing=args.overwrite_existing,
+                                                  incremental=args.incremental, bulk_io=args.bulk_io)
+    failures = 0
+    for result in results:
+        if result.error is None:
+            sys.stderr.write("ok    {0:8.3f}s  {1} -> {2}\n".format(
+                result.seconds, result.input_filename, result.output_filename))
+        else:
+            failures += 1
+            sys.stderr.write("FAIL  {0:8.3f}s  {1}: {2}\n".format(
+                result.seconds, result.input_filename, result.error))
+    sys.stderr.write("{0} catalog(s), {1} failed, {2:.3f}s total\n".format(
+        len(results), failures, sum(result.seconds for result in results)))
+    if args.stats and results:
+        slowest = max(results, key=lambda result: result.seconds)
+        sys.stderr.write("{0:.3f}s elapsed, {1:.3f}s mean per catalog, slowest {2:.3f}s ({3})\n".format(
+            timeit.default_timer() - start, sum(result.seconds for result in results) / len(results),
+            slowest.seconds, slowest.input_filename))
+        _write_stage_stats(stats)
+    return 1 if failures else 0
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import json
+import os
+import os.path
+
+
+MANIFEST_SUFFIX = ".pseudol10n.json"
+
+_format_version = 1
+
+
+def file_hash(filename, chunk_size=1 << 20):
+    """
+    Computes the SHA-1 hash of a file without reading it all into memory.
+
+    :param filename: Name of the file to hash.
+    :param chunk_size: Number of bytes to read at a time.
+    :returns: Hex digest, or None if the file does not exist.
+    """
+    if not os.path.isfile(filename):
+        return None
+    digest = hashlib.sha1()
+    with io.open(filename, mode="rb") as fileobj:
+        for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_key(entry):
+    """
+    Computes the key used to look up a message catalog entry in the manifest.  The key is a hash of everything that
+    determines the pseudo-localized translations of the entry: its msgctxt, msgid, msgid_plural and number of plural
+    forms.
+
+    :param entry: POEntry object.
+    :returns: Hex digest.
+    """
+    parts = [entry.msgctxt or u"", entry.msgid, entry.msgid_plural or u"", u"{0}".format(len(entry.msgstr))]
+    return hashlib.sha1(u"\x00".join(parts).encode("UTF-8")).hexdigest()[:20]
+
+
+class Manifest(object):
+    """
+    Record of a previous pseudo-localization of a message catalog, kept in a file next to the output catalog.  It
+    holds a hash of the input file, a hash of the output file, a fingerprint of the transform configuration and the
+    translations generated for each entry, keyed by entry_key().
+    """
+
+    def __init__(self, filename, input_hash=None, output_hash=None, fingerprint=None, entries=None):
+        """
+        Initializer for class.
+
+        :param filename: Filename of the manifest.
+        :param input_hash: Hash of the input message catalog.
+        :param output_hash: Hash of the output message catalog.
+        :param fingerprint: Fingerprint of the transform configuration and output settings.
+        :param entries: Dict of entry_key() to the list of translations for the entry.
+        """
+        self.filename = filename
+        self.input_hash = input_hash
+        self.output_hash = output_hash
+        self.fingerprint = fingerprint
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def for_output(cls, output_filename):
+        """
+        Loads the manifest kept next to an output message catalog.  A missing or unreadable manifest results in an
+        empty one, which causes everything to be regenerated.
+
+        :param output_filename: Filename of the output message catalog.
+        :returns: Manifest object.
+        """
+        filename = output_filename + MANIFEST_SUFFIX
+        try:
+            with io.open(filename, mode="r", encoding="UTF-8") as fileobj:
+                data = json.load(fileobj)
+            if data.get("version") != _format_version:
+                raise ValueError("Unsupported manifest version")
+            return cls(filename, data["input_hash"], data["output_hash"], data["fingerprint"], data["entries"])
+        except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(filename)
+
+    def is_current(self, input_hash, output_hash, fingerprint):
+        """
+        Checks if the output message catalog is up to date i.e. neither the input, the output nor the configuration
+        have changed since the manifest was saved.
+        """
+        return (self.input_hash is not None and self.input_hash == input_hash and
+                self.output_hash == output_hash and self.fingerprint == fingerprint)
+
+    def save(self):
+        """
+        Writes the manifest.  The file is written under a temporary name and then renamed, so an interrupted run
+        never leaves a truncated manifest behind.
+        """
+        data = {
+            "version": _format_version,
+            "input_hash": self.input_hash,
+            "output_hash": self.output_hash,
+            "fingerprint": self.fingerprint,
+            "entries": self.entries,
+        }
+        temp_filename = self.filename + ".tmp"
+        with io.open(temp_filename, mode="wb") as fileobj:
+            fileobj.write(json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("UTF-8"))
+        if hasattr(os, "replace"):
+            os.replace(temp_filename, self.filename)
+        else:  # Python 2
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(temp_filename, self.filename)
@@ -0,0 +1,116 @@
+import array
+import re
+import struct
+import sys
+
+
+_magic = 0x950412de
+_header_size = 28
+_charset = re.compile(r'(charset=)[^\s\\]+', re.IGNORECASE)
+
+
+def hash_string(s):
+    """
+    Computes the hash used for the hash table of a GNU MO file (the hashpjw function from GNU gettext).
+
+    :param s: Byte string to hash.
+    :returns: 32-bit hash value.
+    """
+    hval = 0
+    for byte in bytearray(s):
+        hval = ((hval << 4) + byte) & 0xffffffff
+        g = hval & 0xf0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+
+def _is_prime(n):
+    divisor = 3
+    while divisor * divisor < n and n % divisor != 0:
+        divisor += 2
+    return n % divisor != 0
+
+
+def _next_prime(n):
+    n |= 1
+    while not _is_prime(n):
+        n += 2
+    return n
+
+
+def message(entry, msgstr):
+    """
+    Converts a message catalog entry into the original and translated strings stored in an MO file.  A msgctxt is
+    joined to the msgid with an EOT character, and plural forms are joined with NUL characters.
+
+    :param entry: POEntry object.
+    :param msgstr: List of translations, one per plural form.
+    :returns: Tuple of (original, translation) strings.
+    """
+    original = entry.msgid
+    if entry.msgctxt is not None:
+        original = entry.msgctxt + u"\x04" + original
+    if entry.msgid_plural is not None:
+        original = original + u"\x00" + entry.msgid_plural
+    return original, u"\x00".join(msgstr)
+
+
+def header(msgstr, encoding):
+    """
+    Sets the charset in the header entry to the encoding that the MO file is written in.
+
+    :param msgstr: Translation of the header entry.
+    :param encoding: Encoding of the MO file.
+    :returns: Updated translation of the header entry.
+    """
+    return _charset.sub(lambda match: match.group(1) + encoding, msgstr)
+
+
+def write(fileobj, messages):
+    """
+    Writes a GNU MO (Machine Object) file, including the hash table used by the gettext runtime to look up messages.
+
+    :param fileobj: File object opened in binary mode.
+    :param messages: Iterable of (original, translation) byte strings.  Messages with an empty translation are left
+                     out, as msgfmt does.
+    """
+    messages = sorted((original, translation) for original, translation in messages if translation)
+    count = len(messages)
+    hash_size = max(_next_prime((count * 4) // 3), 3)
+    originals_offset = _header_size
+    translations_offset = originals_offset + count * 8
+    hash_offset = translations_offset + count * 8
+    strings_offset = hash_offset + hash_size * 4
+
+    originals = array.array("I")
+    translations = array.array("I")
+    offset = strings_offset
+    for original, _ in messages:
+        originals.extend([len(original), offset])
+        offset += len(original) + 1
+    for _, translation in messages:
+        translations.extend([len(translation), offset])
+        offset += len(translation) + 1
+
+    hash_table = array.array("I", [0] * hash_size)
+    for idx, (original, _) in enumerate(messages):
+        hash_value = hash_string(original)
+        bucket = hash_value % hash_size
+        increment = 1 + hash_value % (hash_size - 2)
+        while hash_table[bucket]:
+            if bucket >= hash_size - increment:
+                bucket -= hash_size - increment
+            else:
+                bucket += increment
+        hash_table[bucket] = idx + 1
+
+    fileobj.write(struct.pack("=7I", _magic, 0, count, originals_offset, translations_offset, hash_size,
+                              hash_offset))
+    for table in (originals, translations, hash_table):
+        fileobj.write(table.tostring() if sys.version_info[0] < 3 else table.tobytes())
+    for original, _ in messages:
+        fileobj.write(original + b"\x00")
+    for _, translation in messages:
+        fileobj.write(translation + b"\x00")
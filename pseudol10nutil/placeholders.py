@@ -0,0 +1,96 @@
+import re
+
+import six
+
+
+# Regular expressions for each kind of placeholder, by name.  The transforms leave any text that one of the enabled
+# grammars matches alone.  The patterns must not contain capturing groups, since they are combined into a single
+# pattern with one capturing group that is used to split strings into literal text and placeholders.
+_registry = {
+    # https://docs.python.org/3/library/string.html#formatstrings
+    "python-format": r"{.*?}",
+    # https://docs.python.org/3/library/stdtypes.html#printf-style-string-formatting
+    # Also matches positional specifiers such as '%1$s'.
+    "printf": r"%(?:\(\w+?\))?.*?[acdeEfFgGiorsuxX%]",
+    # {{ expression }}, {% statement %} and {# comment #}
+    "jinja": r"{{.*?}}|{%.*?%}|{#.*?#}",
+    # ICU MessageFormat arguments such as '{count, plural, one {# file} other {# files}}', with up to two levels of
+    # nested sub-messages.
+    "icu": r"{[^{}]*(?:{[^{}]*(?:{[^{}]*}[^{}]*)*}[^{}]*)*}",
+    # HTML and XML tags, comments and character references.
+    "html": r"<!--.*?-->|</?[A-Za-z][^<>]*>|&(?:[A-Za-z]\w*|#\d+|#[xX][0-9A-Fa-f]+);",
+    # ${var} and $var
+    "shell": r"\${[^{}]*}|\$[A-Za-z_]\w*",
+}
+
+# Grammars that are enabled unless others are specified: str.format() fields and printf-style specifiers.
+default = ("python-format", "printf")
+
+# Combined matchers, keyed by the patterns they were built from.
+_matchers = {}
+
+
+def register(name, pattern):
+    """
+    Registers a placeholder grammar under a name, so it can be enabled by name e.g.
+    PseudoL10nUtil(placeholder_grammars=["python-format", "my_grammar"]).
+
+    :param name: Name of the grammar.
+    :param pattern: Regular expression, as a string, that matches a placeholder.  Use non-capturing groups i.e.
+                    (?:...) rather than (...).
+    :raises TypeError: If the pattern is not a string.
+    :raises ValueError: If the pattern is not a valid regular expression, or has capturing groups.
+    """
+    if not isinstance(pattern, six.string_types):
+        raise TypeError("Placeholder pattern must be a string: {0!r}".format(pattern))
+    try:
+        groups = re.compile(pattern).groups
+    except re.error as e:
+        raise ValueError("Invalid placeholder pattern {0!r}: {1}".format(pattern, e))
+    if groups:
+        raise ValueError("Placeholder pattern must not have capturing groups, use (?:...) instead: {0!r}".format(
+            pattern))
+    _registry[name] = pattern
+
+
+def lookup(name):
+    """
+    Looks up a placeholder grammar by name.
+
+    :param name: Name of the grammar e.g. 'python-format', 'printf', 'jinja', 'icu', 'html' or 'shell'.
+    :returns: Regular expression, as a string.
+    :raises ValueError: If no grammar is registered under the name.
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError("Unknown placeholder grammar: {0}.  Available grammars: {1}".format(
+            name, ", ".join(names())))
+
+
+def names():
+    """
+    :returns: Sorted list of the names of the registered placeholder grammars.
+    """
+    return sorted(_registry)
+
+
+def compile_matcher(grammars=None):
+    """
+    Combines placeholder grammars into a single regular expression, so that a string is scanned once no matter how
+    many grammars are enabled.  At each position the grammars are tried in the order given, so more specific
+    grammars should come before more general ones e.g. ['jinja', 'icu', 'printf'] rather than
+    ['python-format', 'jinja'], where '{{ name }}' would be cut short at the first '}'.
+
+    :param grammars: Optional list of grammar names.  Defaults to the 'python-format' and 'printf' grammars.
+    :returns: Compiled regular expression with a single capturing group around the whole match, so that its split()
+              method returns literal text at the even indices and placeholders at the odd indices.
+    :raises ValueError: If a grammar is not registered.
+    """
+    patterns = tuple(lookup(name) for name in (default if grammars is None else grammars))
+    matcher = _matchers.get(patterns)
+    if matcher is None:
+        # A pattern that can never match, when no grammars are enabled.  It must not match the empty string either,
+        # since re.split() rejects such patterns before Python 3.7.
+        matcher = _matchers[patterns] = re.compile(u"({0})".format(u"|".join(patterns) or u"(?!x)x"))
+    return matcher
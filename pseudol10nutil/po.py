@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+import six
+
+
+_keyword_line = re.compile(r'^(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)[ \t]+(".*")[ \t]*$')
+_continuation_line = re.compile(r'^[ \t]*(".*")[ \t]*$')
+# Run of consecutive keyword and continuation lines, as bytes.  Everything between two runs is comments and blank
+# lines, which do not need to be decoded to pseudo-localize the catalog.
+_keyword_block = re.compile(
+    br'^[ \t]*(?:msgctxt|msgid|msgstr)[^\n]*(?:\n[ \t]*(?:msgctxt|msgid|msgstr|")[^\n]*)*(?:\n|\Z)', re.MULTILINE)
+_escape_sequence = re.compile(r'\\(?:([\\"abfnrtv?])|([0-7]{1,3})|x([0-9a-fA-F]+))')
+
+_unescapes = {
+    u'\\': u'\\',
+    u'"': u'"',
+    u'?': u'?',
+    u'a': u'\a',
+    u'b': u'\b',
+    u'f': u'\f',
+    u'n': u'\n',
+    u'r': u'\r',
+    u't': u'\t',
+    u'v': u'\v',
+}
+
+_escapes = {
+    ord(u'\\'): u'\\\\',
+    ord(u'"'): u'\\"',
+    ord(u'\a'): u'\\a',
+    ord(u'\b'): u'\\b',
+    ord(u'\f'): u'\\f',
+    ord(u'\n'): u'\\n',
+    ord(u'\r'): u'\\r',
+    ord(u'\t'): u'\\t',
+    ord(u'\v'): u'\\v',
+}
+
+
+def _unescape_match(match):
+    char, octal, hexadecimal = match.groups()
+    if char is not None:
+        return _unescapes[char]
+    if octal is not None:
+        return six.unichr(int(octal, 8))
+    return six.unichr(int(hexadecimal, 16))
+
+
+def unescape(s):
+    """
+    Converts a quoted string from a PO file into the string it represents e.g. '"Hello\\n"' -> 'Hello' + newline.
+
+    :param s: Quoted string, including the leading and trailing double quotes.
+    :returns: Unquoted string with the C escape sequences replaced.
+    """
+    return _escape_sequence.sub(_unescape_match, s[1:-1])
+
+
+def escape(s):
+    """
+    Converts a string into its quoted form for writing to a PO file.
+
+    :param s: String to quote.
+    :returns: String surrounded with double quotes and with special characters replaced with C escape sequences.
+    """
+    return u'"{0}"'.format(s.translate(_escapes))
+
+
+def format_string(keyword, s, newline=u"\n"):
+    """
+    Formats a keyword and string as lines of a PO file.  Strings with embedded newlines are split across several
+    lines after each newline, the same way the GNU gettext tools do.
+
+    :param keyword: Keyword e.g. 'msgstr' or 'msgstr[1]'.
+    :param s: String value.
+    :param newline: Line terminator to use.
+    :returns: Formatted lines.
+    """
+    lines = s.split(u"\n")
+    if len(lines) <= 2 and not lines[-1] or len(lines) == 1:
+        return u"{0} {1}{2}".format(keyword, escape(s), newline)
+    parts = [u"{0} \"\"{1}".format(keyword, newline)]
+    for line in lines[:-1]:
+        parts.append(escape(line + u"\n") + newline)
+    if lines[-1]:
+        parts.append(escape(lines[-1]) + newline)
+    return u"".join(parts)
+
+
+class POEntry(object):
+    """
+    Single entry of a PO message catalog, along with the comments and blank lines that precede it.  The raw lines of
+    the entry are kept so that everything except the translations can be written back out verbatim.
+    """
+
+    __slots__ = ["lines", "msgstr_index", "msgctxt", "msgid", "msgid_plural", "msgstr"]
+
+    def __init__(self):
+        """
+        Initializer for class.
+        """
+        self.lines = []  # Raw lines of the entry, including line terminators.
+        self.msgstr_index = None  # Index into lines of the first msgstr line.
+        self.msgctxt = None
+        self.msgid = None
+        self.msgid_plural = None
+        self.msgstr = []  # Translations, one per plural form.
+
+    @property
+    def is_header(self):
+        """
+        True if this is the header entry of the catalog i.e. the entry with an empty msgid and no msgctxt.
+        """
+        return self.msgid == u"" and self.msgctxt is None
+
+    @property
+    def newline(self):
+        """
+        Line terminator used by the keyword lines of the entry.  The comments and blank lines that precede them are
+        not looked at, since the memory-mapped path copies those through and does not keep them in the entry.
+        """
+        for line in self.lines:
+            if line.startswith(u"#") or not line.strip():
+                continue
+            if line.endswith(u"\r\n"):
+                return u"\r\n"
+            if line.endswith(u"\n"):
+                return u"\n"
+        return u"\n"
+
+    def _head(self):
+        # Lines that come before the translations, the line terminator, and the number of characters to trim from
+        # the end so that an entry at the end of a file without a final line terminator is written back without one.
+        newline = self.newline
+        if self.msgstr_index is None:
+            head = u"".join(self.lines)
+        else:
+            head = u"".join(self.lines[:self.msgstr_index])
+        trim = len(newline) if self.lines and not self.lines[-1].endswith(u"\n") else 0
+        return head, newline, trim
+
+    def _format_msgstr(self, head, newline, trim, msgstr):
+        if self.msgid_plural is None:
+            result = head + format_string(u"msgstr", msgstr[0], newline)
+        else:
+            parts = [head]
+            for idx, value in enumerate(msgstr):
+                parts.append(format_string(u"msgstr[{0}]".format(idx), value, newline))
+            result = u"".join(parts)
+        return result[:-trim] if trim else result
+
+    def format(self, msgstr=None):
+        """
+        Formats the entry as text, optionally with different translations.
+
+        :param msgstr: Optional list of translations, one per plural form.  If not specified, the entry is returned
+                       exactly as it was read.
+        :returns: Text of the entry.
+        """
+        if msgstr is None or self.msgid is None:
+            return u"".join(self.lines)
+        head, newline, trim = self._head()
+        return self._format_msgstr(head, newline, trim, msgstr)
+
+    def format_many(self, msgstrs):
+        """
+        Formats the entry as text once for each of several lists of translations e.g. one per pseudo-locale.  The
+        lines that come before the translations are only joined once.
+
+        :param msgstrs: List of lists of translations, one per plural form.
+        :returns: List of the texts of the entry, one per list of translations.
+        """
+        if self.msgid is None:
+            return [u"".join(self.lines)] * len(msgstrs)
+        head, newline, trim = self._head()
+        return [self._format_msgstr(head, newline, trim, msgstr) for msgstr in msgstrs]
+
+
+def split_lines(s):
+    """
+    Splits a string into lines, keeping the line terminators.  Unlike str.splitlines(), only newline characters end a
+    line, which is what the gettext tools expect.
+
+    :param s: String to split.
+    :returns: List of lines.
+    """
+    lines = [line + u"\n" for line in s.split(u"\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        del lines[-1]
+    return lines
+
+
+def scan(buffer, start=0, end=None):
+    """
+    Splits the raw bytes of a PO message catalog into regions that contain entries and regions that contain only
+    comments and blank lines.  Works on any object that supports the buffer protocol, including memory-mapped files,
+    and never decodes the data, so the comment regions can be copied through at the cost of a memory copy.  The
+    encoding of the data must be ASCII-compatible e.g. UTF-8 or ISO-8859-1.
+
+    :param buffer: Bytes-like object.
+    :param start: Optional offset to start scanning from.
+    :param end: Optional offset to stop scanning at.
+    :returns: Generator of (is_entries, start, end) tuples that cover the buffer in order.  Pass the bytes of the
+              regions where is_entries is True through split_lines() and parse() to get the entries.
+    """
+    if end is None:
+        end = len(buffer)
+    pos = start
+    for match in _keyword_block.finditer(buffer, start, end):
+        if match.start() > pos:
+            yield False, pos, match.start()
+        yield True, match.start(), match.end()
+        pos = match.end()
+    if pos < end:
+        yield False, pos, end
+
+
+def parse(lines):
+    """
+    Parses a PO message catalog one entry at a time.  Only the entry currently being parsed is held in memory, so
+    catalogs of any size can be processed.  Comments (including obsolete '#~' entries) and blank lines are attached
+    to the entry that follows them; any trailing comments are returned as a final entry with no msgid.
+
+    :param lines: Iterable of lines, including line terminators e.g. a file object.
+    :returns: Generator of POEntry objects.
+    """
+    entry = POEntry()
+    current = None  # Name of the field that continuation lines are appended to.
+    for line_number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        match = _continuation_line.match(stripped)
+        if match:
+            if current is None:
+                raise ValueError("Unexpected string on line {0}: {1}".format(line_number, stripped))
+            value = unescape(match.group(1))
+            if current == "msgstr":
+                entry.msgstr[-1] += value
+            else:
+                setattr(entry, current, getattr(entry, current) + value)
+            entry.lines.append(line)
+            continue
+        if not stripped or stripped.startswith(u"#"):
+            if entry.msgid is not None:
+                yield entry
+                entry = POEntry()
+            current = None
+            entry.lines.append(line)
+            continue
+        match = _keyword_line.match(stripped)
+        if not match:
+            raise ValueError("Syntax error on line {0}: {1}".format(line_number, stripped))
+        keyword, _, value = match.groups()
+        value = unescape(value)
+        if keyword in ("msgctxt", "msgid") and entry.msgid is not None:
+            yield entry
+            entry = POEntry()
+        if keyword.startswith("msgstr"):
+            if entry.msgstr_index is None:
+                entry.msgstr_index = len(entry.lines)
+            entry.msgstr.append(value)
+            current = "msgstr"
+        else:
+            setattr(entry, keyword, value)
+            current = keyword
+        entry.lines.append(line)
+    if entry.lines:
+        yield entry
@@ -1,26 +1,489 @@
 import codecs
+import collections
+import functools
+import io
+import operator
 import os.path
-import re
+import threading
+import timeit
 
 import six
 
-from . import transforms
+from . import placeholders, transforms
+from ._lazy import LazyModule
 
+# Modules that are only needed by some of the file operations and would otherwise dominate the import time.
+hashlib = LazyModule("hashlib")
+mmap = LazyModule("mmap")
+multiprocessing = LazyModule("multiprocessing")
+pickle = LazyModule("pickle")
+sax = LazyModule("xml.sax")
+manifest = LazyModule("pseudol10nutil.manifest")
+mo = LazyModule("pseudol10nutil.mo")
+po = LazyModule("pseudol10nutil.po")
+xliff = LazyModule("pseudol10nutil.xliff")
 
-class PseudoL10nUtil:
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
+
+
+# Combined translation tables, keyed by the identities of the tables they were built from.  The tables are module
+# level constants, so each combination is only built the first time a pipeline uses it.
+_composed_tables = {}
+
+
+def _compose_tables(tables):
+    """
+    Combines translation tables into a single table that has the same effect as applying each of the tables in turn.
+
+    :param tables: List of str.translate() tables, in the order they would be applied.
+    :returns: Single str.translate() table.
+    """
+    key = tuple(id(table) for table in tables)
+    combined = _composed_tables.get(key)
+    if combined is None:
+        combined = {}
+        for table in tables:
+            for code in table:
+                combined.setdefault(code, code)
+            for code, value in combined.items():
+                combined[code] = table.get(value, value)
+        _composed_tables[key] = combined
+    return combined
+
+
+def _pseudolocalize_many(pseudolocalize, strings):
+    """
+    Applies a pseudo-localization function to a batch of strings, calling it only once for each distinct string.
+
+    :param pseudolocalize: Function that pseudo-localizes a single string.
+    :param strings: Iterable of strings, or a mapping whose values are strings.
+    :returns: Dict with the same keys if strings is a mapping, otherwise a list in input order.
+    """
+    results = {}
+
+    def convert(s):
+        try:
+            return results[s]
+        except KeyError:
+            result = results[s] = pseudolocalize(s)
+            return result
+
+    if isinstance(strings, Mapping):
+        return dict((key, convert(value)) for key, value in strings.items())
+    return [convert(s) for s in strings]
+
+
+def _make_wrapper(prefix, suffix):
+    def wrap(s):
+        return prefix + s + suffix
+    return wrap
+
+
+def _transform_name(munge):
+    return getattr(munge, "__name__", None) or repr(munge)
+
+
+def _instrument(name, step, observer):
+    timer = timeit.default_timer
+
+    def instrumented(s):
+        start = timer()
+        result = step(s)
+        observer.record(name, timer() - start, len(s), len(result))
+        return result
+    return instrumented
+
+
+def _compile_steps(transforms_list, observer=None):
+    """
+    Converts a list of transforms into a list of equivalent callables, fusing consecutive transliterations into a
+    single str.translate() call and consecutive brackets into a single concatenation.
+
+    :param transforms_list: List of transforms.
+    :param observer: Optional observer to report the timings of each callable to.  Fused transforms are reported
+                     under their names joined with '+' e.g. 'transliterate_diacritic+transliterate_circled'.
+    :returns: List of callables that take and return a string.
+    """
+    steps = []
+    tables, table_names = [], []
+    prefix, suffix, wrapper_names = u"", u"", []
+
+    def flush_tables():
+        if tables:
+            steps.append((u"+".join(table_names), operator.methodcaller("translate", _compose_tables(tables))))
+            del tables[:], table_names[:]
+
+    def flush_wrappers():
+        if wrapper_names:
+            steps.append((u"+".join(wrapper_names), _make_wrapper(prefix, suffix)))
+            del wrapper_names[:]
+
+    for munge in transforms_list:
+        if munge in transforms._transliteration_tables:
+            flush_wrappers()
+            prefix, suffix = u"", u""
+            tables.append(transforms._transliteration_tables[munge])
+            table_names.append(_transform_name(munge))
+            continue
+        flush_tables()
+        if munge in transforms._wrappers:
+            munge_prefix, munge_suffix = transforms._wrappers[munge]
+            prefix, suffix = munge_prefix + prefix, suffix + munge_suffix
+            wrapper_names.append(_transform_name(munge))
+            continue
+        flush_wrappers()
+        prefix, suffix = u"", u""
+        steps.append((_transform_name(munge), munge))
+    flush_tables()
+    flush_wrappers()
+    if observer is None:
+        return [step for _, step in steps]
+    return [_instrument(name, step, observer) for name, step in steps]
+
+
+StageStats = collections.namedtuple("StageStats", ["calls", "seconds", "chars_in", "chars_out"])
+
+
+class PipelineStats(object):
+    """
+    Observer that keeps count of the calls, the cumulative time and the number of characters in and out of each stage
+    of a pipeline.  The stages are the transforms, plus 'split' and 'join' for the time spent splitting strings on
+    format specifiers and joining them back together.  Pass an instance to PseudoL10nUtil to collect the counters.
+    Any other object with a record() method with the same signature can be used as an observer instead.
+    """
+
+    def __init__(self):
+        """
+        Initializer for class.
+        """
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, chars_in, chars_out):
+        """
+        Records one call of a stage.
+
+        :param name: Name of the stage.
+        :param seconds: Time taken by the call.
+        :param chars_in: Number of characters passed in.
+        :param chars_out: Number of characters returned.
+        """
+        with self._lock:
+            calls, total, total_in, total_out = self._counters.get(name, (0, 0.0, 0, 0))
+            self._counters[name] = (calls + 1, total + seconds, total_in + chars_in, total_out + chars_out)
+
+    def snapshot(self):
+        """
+        Returns the current counters.
+
+        :returns: Dict of stage name to StageStats named tuple (calls, seconds, chars_in, chars_out).
+        """
+        with self._lock:
+            return dict((name, StageStats(*counters)) for name, counters in self._counters.items())
+
+    def reset(self):
+        """
+        Resets all of the counters.
+        """
+        with self._lock:
+            self._counters.clear()
+
+
+# Size of the chunks that the memory-mapped path decodes and writes at a time, and the size above which a region of
+# comments and blank lines is copied through without being decoded.
+_bulk_buffer_size = 1 << 20
+_bulk_passthrough_size = 1 << 12
+# Smallest byte range that a catalog is split into when it is processed by several workers.
+_shard_min_size = 1 << 22
+
+FileResult = collections.namedtuple("FileResult", ["input_filename", "output_filename", "seconds", "error"])
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+_missing = object()
+
+
+class _LRUCache(object):
+    """
+    Thread-safe mapping with a size cap that evicts the least recently used entry, and keeps count of hits, misses and
+    evictions.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, reset_stats=False):
+        with self._lock:
+            self._data.clear()
+            if reset_stats:
+                self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
+
+
+class CompiledPipeline(object):
+    """
+    Pre-computed form of a list of transforms, as returned by PseudoL10nUtil.compile().  The transliteration tables
+    are merged and the brackets are pre-bound once, up front, so that each call only has to tokenize the string,
+    translate it and concatenate the result.
+
+    Pipelines are immutable and hashable: pipelines with the same transforms, placeholder grammars and observer are
+    equal, and with_transforms() returns a new pipeline rather than changing this one.  A single pipeline can be
+    shared by any number of threads without locking.
+    """
+
+    __slots__ = ["_spec", "transforms", "placeholder_grammars", "_matcher", "observer", "template_cache_size",
+                 "_templates", "_steps", "_literal_step", "_post_steps", "_key", "_hash", "_identity"]
+
+    def __init__(self, transforms_list, observer=None, template_cache_size=4096, placeholder_grammars=None):
+        """
+        Initializer for class.
+
+        :param transforms_list: List of transforms to apply, in order.  Transforms can be given by their registered
+                                name e.g. 'diacritic', 'pad' or 'square'.
+        :param observer: Optional observer (e.g. a PipelineStats object) to report the timings of each stage to.
+        :param template_cache_size: Maximum number of tokenized strings to keep, so that strings that are seen again
+                                    do not have to be scanned for format specifiers again.  0 disables the cache.
+        :param placeholder_grammars: Optional list of names of the placeholder grammars to leave alone e.g.
+                                     ['jinja', 'icu', 'printf'].  Defaults to str.format() fields and printf-style
+                                     specifiers.  See the placeholders module.
+        :raises ValueError: If a transform name or placeholder grammar is not registered.
+        """
+        init = functools.partial(object.__setattr__, self)
+        init("_spec", tuple(transforms_list))
+        init("transforms", tuple(transforms.lookup(munge) if isinstance(munge, six.string_types) else munge
+                                 for munge in self._spec))
+        init("placeholder_grammars", placeholders.default if placeholder_grammars is None
+             else tuple(placeholder_grammars))
+        # All of the enabled grammars are combined into one pattern, so each string is only scanned once.
+        init("_matcher", placeholders.compile_matcher(self.placeholder_grammars))
+        init("observer", observer)
+        init("template_cache_size", template_cache_size)
+        # The only state that changes after initialization.  It is a cache that is never iterated, and single dict
+        # operations are atomic, so threads can share it without a lock.
+        init("_templates", {})
+        init("_steps", _compile_steps(self.transforms, observer))
+        # When the string contains format specifiers, the transliterations are applied to the sections of the string
+        # that are not format specifiers, then any other munging is done on the entire string.  All of the
+        # transliterations fuse into a single translate() call, so there is at most one literal step.
+        literal_steps = _compile_steps([t for t in self.transforms if t in transforms._transliterations], observer)
+        init("_literal_step", literal_steps[0] if literal_steps else None)
+        init("_post_steps", _compile_steps(
+            [t for t in self.transforms if t not in transforms._transliterations], observer))
+        # The hash is only computed once, since pipelines are meant to be used as dict keys.
+        init("_key", (self.transforms, self.placeholder_grammars, id(observer)))
+        init("_hash", hash(self._key))
+        # Identifies this particular pipeline in result caches.  A plain object hashes faster than the pipeline.
+        init("_identity", object())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledPipeline is immutable; use with_transforms() to create a new pipeline")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledPipeline is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, CompiledPipeline) and self._key == other._key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Only the configuration is pickled; the steps and the tokenization cache are rebuilt on unpickling.  As with
+        # PseudoL10nUtil, the observer is left out, since it belongs to this process (PipelineStats holds a lock).
+        return CompiledPipeline, (self._spec, None, self.template_cache_size, self.placeholder_grammars)
+
+    def __repr__(self):
+        return "CompiledPipeline({0!r}, placeholder_grammars={1!r})".format(list(self._spec),
+                                                                            list(self.placeholder_grammars))
+
+    def with_transforms(self, transforms_list):
+        """
+        Creates a pipeline with different transforms and the same observer, tokenization cache size and placeholder
+        grammars as this one.
+
+        :param transforms_list: List of transforms (or registered transform names) to apply, in order.
+        :returns: New CompiledPipeline.
+        :raises ValueError: If a transform name is not registered.
+        """
+        return CompiledPipeline(transforms_list, self.observer, self.template_cache_size, self.placeholder_grammars)
+
+    def tokenize(self, s):
+        """
+        Splits a string into literal text and format specifiers in a single pass.  The result is cached, so strings
+        that are seen again are not scanned again.
+
+        :param s: String to tokenize.
+        :returns: Tuple of segments.  The segments at the even indices are literal text and the segments at the odd
+                  indices are format specifiers, so a string without format specifiers is a 1-tuple.
+        """
+        tokens = self._templates.get(s)
+        if tokens is None:
+            # Splitting on a pattern with a capturing group yields the format specifiers at the odd indices, so a
+            # single pass both finds and classifies them.
+            tokens = tuple(self._matcher.split(s))
+            if self.template_cache_size:
+                # Emptying the cache when it is full is much cheaper on this path than keeping track of LRU order.
+                if len(self._templates) >= self.template_cache_size:
+                    self._templates.clear()
+                self._templates[s] = tokens
+        return tokens
+
+    def render(self, tokens):
+        """
+        Applies the transforms to a tokenized string.
+
+        :param tokens: Tuple of segments as returned by tokenize().
+        :returns: Pseudo-localized string.
+        """
+        if len(tokens) == 1:
+            result = tokens[0]
+            for step in self._steps:
+                result = step(result)
+            return result
+        literal_step = self._literal_step
+        if literal_step is None:
+            result = u"".join(tokens)
+        else:
+            substrings = list(tokens)
+            substrings[::2] = [literal_step(substring) for substring in tokens[::2]]
+            result = u"".join(substrings)
+        for step in self._post_steps:
+            result = step(result)
+        return result
+
+    def pseudolocalize(self, s):
+        """
+        Performs pseudo-localization on a string using the compiled transforms.
+
+        :param s: String to pseudo-localize.
+        :returns: Copy of the string s with the transforms applied.  If the input
+                  string is an empty string or None, an empty string is returned.
+        """
+        if not s:  # If the string is empty or None
+            return u""
+        if not isinstance(s, six.text_type):
+            raise TypeError("String to pseudo-localize must be of type '{0}'.".format(six.text_type.__name__))
+        # If no transforms are defined, return the string as-is.
+        if not self.transforms:
+            return s
+        if self.observer is not None:
+            return self._pseudolocalize_observed(s)
+        return self.render(self.tokenize(s))
+
+    __call__ = pseudolocalize
+
+    def _pseudolocalize_observed(self, s):
+        timer = timeit.default_timer
+        start = timer()
+        tokens = self.tokenize(s)
+        self.observer.record("split", timer() - start, len(s), len(s))
+        if len(tokens) == 1:
+            return self.render(tokens)
+        substrings = list(tokens)
+        if self._literal_step is not None:
+            substrings[::2] = [self._literal_step(substring) for substring in tokens[::2]]
+        start = timer()
+        result = u"".join(substrings)
+        self.observer.record("join", timer() - start, len(result), len(result))
+        for step in self._post_steps:
+            result = step(result)
+        return result
+
+    def fingerprint(self):
+        """
+        Computes a fingerprint of the transforms and placeholder grammars, which stays the same across processes as
+        long as the same transforms are used in the same order.  Transforms are identified by their module and
+        qualified name, or by their repr() if they do not have a name.
+
+        :returns: Hex digest.
+        """
+        names = []
+        for munge in self.transforms:
+            name = getattr(munge, "__qualname__", None) or getattr(munge, "__name__", None)
+            if name is None:
+                names.append(repr(munge))
+            else:
+                names.append(u"{0}.{1}".format(getattr(munge, "__module__", None), name))
+        if self.placeholder_grammars != placeholders.default:
+            # Left out for the default grammars, so that fingerprints from before grammars were configurable match.
+            names.append(u"placeholders: " + u", ".join(
+                placeholders.lookup(name) for name in self.placeholder_grammars))
+        return hashlib.sha1(u"\n".join(names).encode("UTF-8")).hexdigest()
+
+    def pseudolocalize_many(self, strings):
+        """
+        Performs pseudo-localization on a batch of strings.  Each distinct string is only pseudo-localized once, no
+        matter how many times it appears in the batch.
+
+        :param strings: Iterable (list, generator, etc.) of strings, or a mapping whose values are strings.
+        :returns: If strings is a mapping, a dict with the same keys and the pseudo-localized values.  Otherwise, a
+                  list of the pseudo-localized strings in input order.
+        """
+        return _pseudolocalize_many(self.pseudolocalize, strings)
+
+
+class PseudoL10nUtil(object):
     """
     Class for performing pseudo-localization on strings.
     """
 
-    def __init__(self, init_transforms=None):
+    def __init__(self, init_transforms=None, cache_size=None, observer=None, placeholder_grammars=None):
         """
         Initializer for class.
 
         :param init_transforms: Optional list of initial transforms.  If not
                                 specified, the default list of transforms is
                                 transliterate_diacritic, pad_length and
-                                square_brackets.
+                                square_brackets.  Transforms can also be
+                                given by their registered name e.g.
+                                ["diacritic", "pad", "square"].
+        :param cache_size: Optional maximum number of results to memoize.  If
+                           not specified (or 0), results are not cached.
+        :param observer: Optional observer (e.g. a PipelineStats object) that
+                         is told the time taken and the number of characters
+                         in and out of each transform.
+        :param placeholder_grammars: Optional list of names of the
+                                     placeholder grammars to leave alone,
+                                     e.g. ['jinja', 'icu', 'printf'].  If not
+                                     specified, str.format() fields and
+                                     printf-style specifiers are left alone.
         """
+        self._cache = _LRUCache(cache_size) if cache_size else None
+        self._observer = observer
+        self._placeholder_grammars = placeholder_grammars
         if init_transforms is not None:
             self.transforms = init_transforms
         else:
@@ -30,6 +493,73 @@ class PseudoL10nUtil:
                 transforms.square_brackets
                 ]
 
+    def __getstate__(self):
+        # The compiled pipeline and the cache are rebuilt on demand, so only the configuration needs to be pickled
+        # e.g. when the object is sent to a worker process.
+        return {"transforms": self._transforms, "cache_size": self._cache.maxsize if self._cache is not None else None,
+                "placeholder_grammars": self._placeholder_grammars}
+
+    def __setstate__(self, state):
+        self.__init__(state["transforms"], state["cache_size"],
+                      placeholder_grammars=state.get("placeholder_grammars"))
+
+    @property
+    def observer(self):
+        """
+        Observer that is told the timings of each transform, or None.
+        """
+        return self._observer
+
+    @observer.setter
+    def observer(self, value):
+        self._observer = value
+        self._pipeline = None
+
+    @property
+    def placeholder_grammars(self):
+        """
+        List of names of the placeholder grammars to leave alone, or None for the default grammars.  Assigning a new
+        list clears the cache.
+        """
+        return self._placeholder_grammars
+
+    @placeholder_grammars.setter
+    def placeholder_grammars(self, value):
+        self._placeholder_grammars = value
+        self._pipeline = None
+        if self._cache is not None:
+            self._cache.clear()
+
+    @property
+    def transforms(self):
+        """
+        List of transforms (or registered transform names) to apply to the string, in order.  Assigning a new list
+        clears the cache.
+        """
+        return self._transforms
+
+    @transforms.setter
+    def transforms(self, value):
+        self._transforms = value
+        self._pipeline = None
+        if self._cache is not None:
+            self._cache.clear()
+
+    def compile(self):
+        """
+        Compiles the current list of transforms.  The result is cached and reused by pseudolocalize() until the
+        transforms change.
+
+        :returns: CompiledPipeline for the current list of transforms.
+        """
+        current = tuple(self._transforms or ())
+        grammars = self._placeholder_grammars
+        grammars = placeholders.default if grammars is None else tuple(grammars)
+        pipeline = self._pipeline
+        if pipeline is None or pipeline._spec != current or pipeline.placeholder_grammars != grammars:
+            pipeline = self._pipeline = CompiledPipeline(current, self._observer, placeholder_grammars=grammars)
+        return pipeline
+
     def pseudolocalize(self, s):
         """
         Performs pseudo-localization on a string.  The specific transforms to be
@@ -39,43 +569,50 @@ class PseudoL10nUtil:
         :returns: Copy of the string s with the transforms applied.  If the input
                   string is an empty string or None, an empty string is returned.
         """
-        if not s:  # If the string is empty or None
-            return u""
-        if not isinstance(s, six.text_type):
-            raise TypeError("String to pseudo-localize must be of type '{0}'.".format(six.text_type.__name__))
-        # If no transforms are defined, return the string as-is.
-        if not self.transforms:
-            return s
-        fmt_spec = re.compile(
-            r"""(
-            {.*?}  # https://docs.python.org/3/library/string.html#formatstrings
-            |
-            %(?:\(\w+?\))?.*?[acdeEfFgGiorsuxX%]  # https://docs.python.org/3/library/stdtypes.html#printf-style-string-formatting
-            )""", re.VERBOSE)
-        # If we don't find any format specifiers in the input string, just munge the entire string at once.
-        if not fmt_spec.search(s):
-            result = s
-            for munge in self.transforms:
-                result = munge(result)
-        # If there are format specifiers, we do transliterations on the sections of the string that are not format
-        # specifiers, then do any other munging (padding the length, adding brackets) on the entire string.
-        else:
-            substrings = fmt_spec.split(s)
-            for munge in self.transforms:
-                if munge in transforms._transliterations:
-                    for idx in range(len(substrings)):
-                        if not fmt_spec.match(substrings[idx]):
-                            substrings[idx] = munge(substrings[idx])
-                    else:
-                        continue
-                else:
-                    continue
-            result = u"".join(substrings)
-            for munge in self.transforms:
-                if munge not in transforms._transliterations:
-                    result = munge(result)
+        pipeline = self.compile()
+        cache = self._cache
+        if cache is None:
+            return pipeline.pseudolocalize(s)
+        # The compiled pipeline identifies the transform chain, so results from a previous chain are never returned
+        # even if the transforms list was modified in place.
+        key = (pipeline._identity, s)
+        result = cache.get(key, _missing)
+        if result is _missing:
+            result = pipeline.pseudolocalize(s)
+            cache.put(key, result)
         return result
 
+    def pseudolocalize_many(self, strings):
+        """
+        Performs pseudo-localization on a batch of strings.  Each distinct string is only pseudo-localized once, no
+        matter how many times it appears in the batch.
+
+        :param strings: Iterable (list, generator, etc.) of strings, or a mapping whose values are strings.
+        :returns: If strings is a mapping, a dict with the same keys and the pseudo-localized values.  Otherwise, a
+                  list of the pseudo-localized strings in input order.
+        """
+        if self._cache is None:
+            return self.compile().pseudolocalize_many(strings)
+        return _pseudolocalize_many(self.pseudolocalize, strings)
+
+    def cache_info(self):
+        """
+        Returns statistics for the cache.
+
+        :returns: CacheInfo named tuple with the hits, misses, evictions, maxsize and currsize of the cache, or None
+                  if caching is not enabled.
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def cache_clear(self):
+        """
+        Empties the cache and resets its statistics.
+        """
+        if self._cache is not None:
+            self._cache.clear(reset_stats=True)
+
 
 class POFileUtil:
     """
@@ -95,10 +632,29 @@ class POFileUtil:
         else:
             self.l10nutil = l10nutil
 
+    def pseudolocalizeentry(self, entry):
+        """
+        Method for pseudo-localizing a single message catalog entry.
+
+        :param entry: POEntry object.
+        :returns: List of pseudo-localized translations, one per plural form, or None if the entry should be written
+                  out unchanged (the header entry, or trailing comments).
+        """
+        if entry.msgid is None or entry.is_header:
+            return None
+        msgstr = [self.l10nutil.pseudolocalize(entry.msgid)]
+        if entry.msgid_plural is not None:
+            plural = self.l10nutil.pseudolocalize(entry.msgid_plural)
+            msgstr.extend([plural] * (max(len(entry.msgstr), 2) - 1))
+        return msgstr
+
     def pseudolocalizefile(self, input_filename, output_filename, input_encoding='UTF-8', output_encoding='UTF-8',
-                           overwrite_existing=True):
+                           overwrite_existing=True, incremental=False, mo_filename=None, bulk_io=False, workers=1):
         """
-        Method for pseudo-localizing the message catalog file.
+        Method for pseudo-localizing the message catalog file.  The catalog is processed one entry at a time, so
+        memory use does not depend on the size of the catalog.  Comments, the header entry, msgctxt, msgid and
+        msgid_plural lines are copied as-is and every msgstr is replaced with the pseudo-localized msgid (or
+        msgid_plural, for plural forms other than the first).
 
         :param input_filename: Filename of the source (input) message catalog file.
         :param output_filename: Filename of the target (output) message catalog file.
@@ -106,19 +662,546 @@ class POFileUtil:
         :param output_encoding: String indicating the encoding of the output file.  Optional, defaults to 'UTF-8'.
         :param overwrite_existing: Boolean indicating if an existing output message catalog file should be overwritten.
                                    True by default. If False, an IOError will be raised.
+        :param incremental: Boolean indicating if a manifest should be kept next to the output message catalog (in
+                            <output_filename>.pseudol10n.json) to avoid repeating work on the next run.  If the
+                            input, the output and the transforms are unchanged, the file is skipped entirely;
+                            otherwise only entries whose msgid changed are pseudo-localized again.  False by default.
+        :param mo_filename: Optional filename of a compiled (.mo) message catalog file to write in the same pass.
+        :param bulk_io: Boolean indicating if the input file should be memory-mapped, with comments and blank lines
+                        copied to the output without being decoded, and the output written in large buffered chunks.
+                        Only used when the input and output encodings are the same ASCII-compatible encoding (e.g.
+                        UTF-8); otherwise the catalog is streamed line by line.  False by default.
+        :param workers: Optional number of worker processes to split a large catalog across.  The input is split
+                        into byte ranges at entry boundaries, each range is pseudo-localized in a worker process and
+                        the results are written in the original order, so the output is identical to that of a
+                        single process.  If None, defaults to the number of CPUs.  Only used for catalogs of at least
+                        two shards (_shard_min_size bytes each) with ASCII-compatible encodings (e.g. UTF-8), when
+                        neither incremental nor mo_filename is given, and when the transforms can be pickled (e.g.
+                        not lambdas); otherwise the catalog is processed in the current process.  1 by default.
+        """
+        self._pseudolocalize(input_filename, output_filename, mo_filename, input_encoding, output_encoding,
+                             overwrite_existing, incremental, bulk_io, workers)
+
+    def pseudolocalizemofile(self, input_filename, mo_filename, input_encoding='UTF-8', output_encoding='UTF-8',
+                             overwrite_existing=True, incremental=False, bulk_io=False):
         """
-        leading_trailing_double_quotes = re.compile(r'^"|"$')
+        Method for pseudo-localizing the message catalog file straight into a compiled GNU MO (Machine Object) file,
+        including the hash table, without writing a PO file and running msgfmt on it.
+
+        :param input_filename: Filename of the source (input) message catalog file.
+        :param mo_filename: Filename of the target (output) compiled message catalog file.
+        :param input_encoding: String indicating the encoding of the input file.  Optional, defaults to 'UTF-8'.
+        :param output_encoding: String indicating the encoding of the strings in the output file.  Optional,
+                                defaults to 'UTF-8'.  The charset in the header entry is set to match.
+        :param overwrite_existing: Boolean indicating if an existing output file should be overwritten.  True by
+                                   default. If False, an IOError will be raised.
+        :param incremental: Boolean indicating if a manifest should be kept next to the output file to avoid
+                            repeating work on the next run.  See pseudolocalizefile().  False by default.
+        :param bulk_io: Boolean indicating if the input file should be memory-mapped.  See pseudolocalizefile().
+                        False by default.
+        """
+        self._pseudolocalize(input_filename, None, mo_filename, input_encoding, output_encoding, overwrite_existing,
+                             incremental, bulk_io, 1)
+
+    def pseudolocalizevariants(self, input_filename, variants, input_encoding='UTF-8', output_encoding='UTF-8',
+                               overwrite_existing=True):
+        """
+        Method for pseudo-localizing the message catalog file into several pseudo-locales in a single pass e.g. a
+        diacritic, a fullwidth and a padded-only variant.  Each entry is read and parsed once, and each message is
+        scanned for placeholders once and the result shared by every variant with the same placeholder grammars, so
+        the cost of parsing and tokenizing the catalog does not grow with the number of variants.
+
+        :param input_filename: Filename of the source (input) message catalog file.
+        :param variants: Mapping (or list of pairs) of the filename of each target (output) message catalog file to
+                         the PseudoL10nUtil object to pseudo-localize it with.  The l10nutil field of this object is
+                         not used.
+        :param input_encoding: String indicating the encoding of the input file.  Optional, defaults to 'UTF-8'.
+        :param output_encoding: String indicating the encoding of the output files.  Optional, defaults to 'UTF-8'.
+        :param overwrite_existing: Boolean indicating if existing output message catalog files should be overwritten.
+                                   True by default. If False, an IOError will be raised.
+        """
+        variants = list(variants.items()) if isinstance(variants, Mapping) else list(variants)
+        if not os.path.isfile(input_filename):
+            raise IOError("Input message catalog not found: {0}".format(os.path.abspath(input_filename)))
+        for filename, _ in variants:
+            if os.path.isfile(filename) and not overwrite_existing:
+                raise IOError("Error, output message catalog already exists: {0}".format(os.path.abspath(filename)))
+        pseudolocalize = _variants_function([l10nutil.compile() for _, l10nutil in variants])
+        out_fileobjs = []
+        try:
+            for filename, _ in variants:
+                out_fileobjs.append(io.open(filename, mode="w", encoding=output_encoding, newline="\n"))
+            with io.open(input_filename, mode="r", encoding=input_encoding, newline="\n") as in_fileobj:
+                for entry in po.parse(in_fileobj):
+                    if entry.msgid is None or entry.is_header:
+                        text = entry.format()
+                        for out_fileobj in out_fileobjs:
+                            out_fileobj.write(text)
+                        continue
+                    if entry.msgid_plural is None:
+                        msgstrs = [[singular] for singular in pseudolocalize(entry.msgid)]
+                    else:
+                        forms = max(len(entry.msgstr), 2) - 1
+                        msgstrs = [[singular] + [plural] * forms for singular, plural in
+                                   zip(pseudolocalize(entry.msgid), pseudolocalize(entry.msgid_plural))]
+                    for out_fileobj, text in zip(out_fileobjs, entry.format_many(msgstrs)):
+                        out_fileobj.write(text)
+        finally:
+            for out_fileobj in out_fileobjs:
+                out_fileobj.close()
+
+    def pseudolocalizestream(self, in_fileobj, out_fileobj):
+        """
+        Method for pseudo-localizing a message catalog read from one text file object and written to another e.g.
+        from stdin to stdout.  The catalog is processed one entry at a time, so memory use does not depend on the
+        size of the catalog.
+
+        :param in_fileobj: File object (or any iterable of lines) to read the message catalog from.
+        :param out_fileobj: File object to write the pseudo-localized message catalog to.
+        :returns: Number of entries processed.
+        """
+        count = 0
+        for entry in po.parse(in_fileobj):
+            out_fileobj.write(entry.format(self.pseudolocalizeentry(entry)))
+            count += 1
+        return count
+
+    def _pseudolocalize(self, input_filename, output_filename, mo_filename, input_encoding, output_encoding,
+                        overwrite_existing, incremental, bulk_io, workers):
+        output_filenames = [filename for filename in (output_filename, mo_filename) if filename]
         if not os.path.isfile(input_filename):
             raise IOError("Input message catalog not found: {0}".format(os.path.abspath(input_filename)))
+        for filename in output_filenames:
+            if os.path.isfile(filename) and not overwrite_existing:
+                raise IOError("Error, output message catalog already exists: {0}".format(os.path.abspath(filename)))
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers > 1 and not incremental and mo_filename is None and _is_ascii_compatible(input_encoding) \
+                and _is_ascii_compatible(output_encoding):
+            if self._pseudolocalize_sharded(input_filename, output_filename, input_encoding, output_encoding,
+                                            workers):
+                return
+        pseudolocalizeentry = self.pseudolocalizeentry
+        if incremental:
+            previous = manifest.Manifest.for_output(output_filenames[0])
+            input_hash = manifest.file_hash(input_filename)
+            fingerprint = u"{0}:{1}:{2}".format(self.l10nutil.compile().fingerprint(), input_encoding,
+                                                output_encoding)
+            if previous.is_current(input_hash, _outputs_hash(output_filenames), fingerprint):
+                return
+            reusable = previous.entries if previous.fingerprint == fingerprint else {}
+            current = manifest.Manifest(previous.filename, input_hash, fingerprint=fingerprint)
+            pseudolocalizeentry = functools.partial(self._pseudolocalizeentry_incremental, reusable, current.entries)
+        messages = [] if mo_filename else None
+
+        def process(entry):
+            msgstr = pseudolocalizeentry(entry)
+            if messages is not None and entry.msgid is not None:
+                mo_msgstr = msgstr
+                if mo_msgstr is None:
+                    mo_msgstr = entry.msgstr
+                    if entry.is_header and mo_msgstr:
+                        mo_msgstr = [mo.header(mo_msgstr[0], output_encoding)]
+                original, translation = mo.message(entry, mo_msgstr)
+                messages.append((original.encode(output_encoding), translation.encode(output_encoding)))
+            return msgstr
+
+        if bulk_io and _is_bulk_compatible(input_encoding, output_encoding):
+            self._pseudolocalize_bulk(input_filename, output_filename, input_encoding, process)
+        else:
+            with io.open(input_filename, mode="r", encoding=input_encoding, newline="\n") as in_fileobj:
+                out_fileobj = None
+                if output_filename:
+                    out_fileobj = io.open(output_filename, mode="w", encoding=output_encoding, newline="\n")
+                try:
+                    for entry in po.parse(in_fileobj):
+                        msgstr = process(entry)
+                        if out_fileobj is not None:
+                            out_fileobj.write(entry.format(msgstr))
+                finally:
+                    if out_fileobj is not None:
+                        out_fileobj.close()
+        if messages is not None:
+            with io.open(mo_filename, mode="wb") as mo_fileobj:
+                mo.write(mo_fileobj, messages)
+        if incremental:
+            current.output_hash = _outputs_hash(output_filenames)
+            current.save()
+
+    def _pseudolocalize_bulk(self, input_filename, output_filename, encoding, process):
+        """
+        Memory-mapped implementation of _pseudolocalize().  Large regions of the input that only contain comments and
+        blank lines are copied to the output without being decoded.  Everything else is decoded, pseudo-localized and
+        written in chunks of about _bulk_buffer_size bytes.
+        """
+        out_fileobj = None
+        if output_filename:
+            out_fileobj = io.open(output_filename, mode="wb", buffering=_bulk_buffer_size)
+
+        def flush(buffer, start, end):
+            parts = []
+            for entry in po.parse(po.split_lines(buffer[start:end].decode(encoding))):
+                msgstr = process(entry)
+                if out_fileobj is not None:
+                    parts.append(entry.format(msgstr))
+            if out_fileobj is not None:
+                out_fileobj.write(u"".join(parts).encode(encoding))
+
+        try:
+            with io.open(input_filename, mode="rb") as in_fileobj:
+                if os.fstat(in_fileobj.fileno()).st_size == 0:  # Empty files cannot be memory-mapped.
+                    return
+                buffer = mmap.mmap(in_fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    chunk_start = None
+                    for is_entries, start, end in po.scan(buffer):
+                        if not is_entries and end - start >= _bulk_passthrough_size:
+                            if chunk_start is not None:
+                                flush(buffer, chunk_start, start)
+                                chunk_start = None
+                            if out_fileobj is not None:
+                                out_fileobj.write(buffer[start:end])
+                            continue
+                        if chunk_start is None:
+                            chunk_start = start
+                        if end - chunk_start >= _bulk_buffer_size:
+                            flush(buffer, chunk_start, end)
+                            chunk_start = None
+                    if chunk_start is not None:
+                        flush(buffer, chunk_start, len(buffer))
+                finally:
+                    buffer.close()
+        finally:
+            if out_fileobj is not None:
+                out_fileobj.close()
+
+    def _pseudolocalize_sharded(self, input_filename, output_filename, input_encoding, output_encoding, workers):
+        """
+        Process pool implementation of _pseudolocalize() for large catalogs.  The workers read their own byte range
+        of the input, so only the configuration and the pseudo-localized output are sent between processes.
+
+        :returns: True if the catalog was processed, or False if it is too small to be worth splitting, or cannot be
+                  sent to the workers.
+        """
+        with io.open(input_filename, mode="rb") as in_fileobj:
+            size = os.fstat(in_fileobj.fileno()).st_size
+            if size < 2 * _shard_min_size:
+                return False
+            buffer = mmap.mmap(in_fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                # More shards than workers, so that a shard of long strings does not leave the other workers idle.
+                shards = _shard_ranges(buffer, min(workers * 4, size // _shard_min_size))
+            finally:
+                buffer.close()
+        if len(shards) < 2 or not _is_picklable(self):
+            return False
+        jobs = [(self, input_filename, input_encoding, output_encoding, start, end) for start, end in shards]
+        pool = multiprocessing.Pool(min(workers, len(jobs)))
+        try:
+            # imap() returns the results in order, while letting the workers run ahead of the writes.
+            results = pool.imap(_pseudolocalize_shard, jobs)
+            # The output is only opened once the first shard is done, so that an error in the workers does not leave
+            # an empty file behind.
+            data = next(results)
+            with io.open(output_filename, mode="wb") as out_fileobj:
+                out_fileobj.write(data)
+                for data in results:
+                    out_fileobj.write(data)
+        finally:
+            pool.close()
+            pool.join()
+        return True
+
+    def _pseudolocalizeentry_incremental(self, reusable, entries, entry):
+        if entry.msgid is None or entry.is_header:
+            return None
+        key = manifest.entry_key(entry)
+        msgstr = reusable.get(key)
+        if msgstr is None:
+            msgstr = self.pseudolocalizeentry(entry)
+        entries[key] = msgstr
+        return msgstr
+
+    def pseudolocalizetree(self, input_paths, output_root, locale=None, workers=None, input_encoding='UTF-8',
+                           output_encoding='UTF-8', overwrite_existing=True, incremental=False, bulk_io=False):
+        """
+        Method for pseudo-localizing every message catalog in a directory tree, using a pool of worker processes.
+        A failure in one catalog is reported in the results and does not stop the others from being processed.
+
+        :param input_paths: Directory to search for .po and .pot files e.g. 'locales/', or a list of directories and
+                            message catalog files.
+        :param output_root: Directory to write the pseudo-localized message catalogs to.  The layout of the input
+                            directory is mirrored, with .pot templates written as .po files.
+        :param locale: Optional locale name e.g. 'eo'.  If specified, .pot templates are written to
+                       <output_root>/<locale>/LC_MESSAGES/<domain>.po instead.
+        :param workers: Optional number of worker processes.  Defaults to the number of CPUs.  If 1, or if the
+                        transforms cannot be pickled (e.g. lambdas), the catalogs are processed in the current process.
+        :param input_encoding: String indicating the encoding of the input files.  Optional, defaults to 'UTF-8'.
+        :param output_encoding: String indicating the encoding of the output files.  Optional, defaults to 'UTF-8'.
+        :param overwrite_existing: Boolean indicating if existing output message catalog files should be
+                                   overwritten.  True by default.  If False, those files are reported as failures.
+        :param incremental: Boolean indicating if unchanged work should be skipped using a manifest kept next to each
+                            output message catalog.  See pseudolocalizefile().  False by default.
+        :param bulk_io: Boolean indicating if the input files should be memory-mapped.  See pseudolocalizefile().
+                        False by default.
+        :returns: List of FileResult named tuples (input_filename, output_filename, seconds, error), in the same
+                  order as the catalogs were found.  error is None if the catalog was processed successfully.
+        """
+        kwargs = {
+            "input_encoding": input_encoding,
+            "output_encoding": output_encoding,
+            "overwrite_existing": overwrite_existing,
+            "incremental": incremental,
+            "bulk_io": bulk_io,
+        }
+        jobs = []
+        results = []
+        seen = set()
+        for input_filename, output_filename in _find_catalogs(input_paths, output_root, locale):
+            # Two inputs that map to the same output would have the workers racing to write the same file.
+            key = os.path.normcase(os.path.abspath(output_filename))
+            if key in seen:
+                results.append(FileResult(input_filename, output_filename, 0.0,
+                                          "Duplicate output message catalog: {0}".format(output_filename)))
+                continue
+            seen.add(key)
+            jobs.append((self, input_filename, output_filename, kwargs))
+            results.append(None)
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if len(jobs) == 1 and workers > 1:
+            # With a single catalog, the workers split the catalog itself instead.
+            kwargs["workers"] = workers
+        if workers <= 1 or len(jobs) <= 1 or not _is_picklable(self):
+            completed = [_pseudolocalizefile_job(job) for job in jobs]
+        else:
+            pool = multiprocessing.Pool(min(workers, len(jobs)))
+            try:
+                completed = pool.map(_pseudolocalizefile_job, jobs, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        completed = iter(completed)
+        return [result if result is not None else next(completed) for result in results]
+
+
+class XLIFFFileUtil:
+    """
+    Class for performing pseudo-localization on XLIFF 1.2 and 2.0 files.
+    """
+
+    def __init__(self, l10nutil=None):
+        """
+        Initializer for class.
+
+        :param l10nutil: Optional instance of PseudoL10nUtil object.  This can be used to pass in an instance of the
+                         PseudoL10nUtil class with the transforms already configured.  Otherwise, an instance of the
+                         PseudoL10nUtil class will be created with the default transforms.
+        """
+        if not l10nutil:
+            self.l10nutil = PseudoL10nUtil()
+        else:
+            self.l10nutil = l10nutil
+
+    def pseudolocalizefile(self, input_filename, output_filename, output_encoding='UTF-8', overwrite_existing=True):
+        """
+        Method for pseudo-localizing an XLIFF file.  The file is parsed and written incrementally, without building a
+        DOM, so memory use does not depend on the size of the file.  The source of each translation unit (trans-unit
+        in XLIFF 1.2, segment in XLIFF 2.0) is pseudo-localized into its target, replacing any existing target.
+        Inline elements such as <x/>, <g>, <ph> and <pc> are protected in the same way as format specifiers.
+        Everything else, including units with translate="no" or inside a group or file with translate="no", is copied
+        as-is.
+
+        :param input_filename: Filename of the input XLIFF file.  The encoding is taken from its XML declaration.
+        :param output_filename: Filename of the output XLIFF file.
+        :param output_encoding: Optional encoding of the output file.  Default is 'UTF-8'.  Characters that cannot be
+                                encoded are written as character references.
+        :param overwrite_existing: Boolean indicating if an existing output file should be overwritten.  True by
+                                   default.
+        :raises ValueError: If the input file is not well-formed XML.
+        """
+        if not os.path.isfile(input_filename):
+            raise IOError("Input XLIFF file not found: {0}".format(os.path.abspath(input_filename)))
         if os.path.isfile(output_filename) and not overwrite_existing:
-            raise IOError("Error, output message catalog already exists: {0}".format(os.path.abspath(output_filename)))
-        with codecs.open(input_filename, mode="r", encoding=input_encoding) as in_fileobj:
-            with codecs.open(output_filename, mode="w", encoding=output_encoding) as out_fileobj:
-                for current_line in in_fileobj:
-                    out_fileobj.write(current_line)
-                    if current_line.startswith("msgid"):
-                        msgid = current_line.split(None, 1)[1].strip()
-                        msgid = leading_trailing_double_quotes.sub('', msgid)
-                        msgstr = self.l10nutil.pseudolocalize(msgid)
-                        out_fileobj.write(u"msgstr \"{0}\"\n".format(msgstr))
-                        next(in_fileobj)
+            raise IOError("Error, output XLIFF file already exists: {0}".format(os.path.abspath(output_filename)))
+        pipeline = self.l10nutil.compile()
+        with io.open(input_filename, mode="rb") as input_file, \
+                io.open(output_filename, mode="w", encoding=output_encoding, errors="xmlcharrefreplace",
+                        newline="") as output_file:
+            parser = xliff.make_parser(xliff.XLIFFRewriter(pipeline, output_file.write, output_encoding))
+            try:
+                for chunk in iter(functools.partial(input_file.read, _bulk_buffer_size), b""):
+                    parser.feed(chunk)
+                parser.close()
+            except sax.SAXParseException as e:
+                raise ValueError("Error parsing {0}: {1}".format(input_filename, e))
+
+
+def _variants_function(pipelines):
+    """
+    Creates a function that pseudo-localizes a string with each of the pipelines, tokenizing it only once for all of
+    the pipelines that use the same placeholder grammars.
+
+    :param pipelines: List of CompiledPipeline objects.
+    :returns: Function that takes a string and returns a list of the results, one per pipeline.
+    """
+    tokenizers = []  # For each pipeline, the index of the first pipeline with the same placeholder grammars.
+    first = {}
+    for idx, pipeline in enumerate(pipelines):
+        tokenizers.append(first.setdefault(pipeline.placeholder_grammars, idx))
+
+    def pseudolocalize(s):
+        if not s:
+            return [u""] * len(pipelines)
+        tokens = {}
+        results = []
+        for pipeline, tokenizer in zip(pipelines, tokenizers):
+            if not pipeline.transforms or pipeline.observer is not None:
+                results.append(pipeline.pseudolocalize(s))
+                continue
+            shared = tokens.get(tokenizer)
+            if shared is None:
+                shared = tokens[tokenizer] = pipelines[tokenizer].tokenize(s)
+            results.append(pipeline.render(shared))
+        return results
+
+    return pseudolocalize
+
+
+def _is_bulk_compatible(input_encoding, output_encoding):
+    """
+    Checks if the memory-mapped path can be used for a pair of encodings.  Comments are copied through without being
+    decoded, so both encodings have to be the same, and the PO syntax is scanned as bytes, so the encoding has to be
+    ASCII-compatible.
+    """
+    if codecs.lookup(input_encoding).name != codecs.lookup(output_encoding).name:
+        return False
+    return _is_ascii_compatible(input_encoding)
+
+
+def _is_ascii_compatible(encoding):
+    """
+    Checks if the PO syntax can be found in text in an encoding by scanning its bytes, and if text in the encoding can
+    be split into pieces that are decoded or encoded separately.  Encodings that write a byte order mark (e.g.
+    'UTF-16' or 'UTF-8-sig') are not.
+    """
+    try:
+        return u'msgid "#\n'.encode(encoding) == b'msgid "#\n'
+    except UnicodeError:
+        return False
+
+
+def _is_picklable(obj):
+    """
+    Checks if an object can be sent to a worker process.  Transforms that are lambdas or closures cannot be.
+    """
+    try:
+        pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    return True
+
+
+def _shard_ranges(buffer, count):
+    """
+    Splits a message catalog into about count byte ranges of similar size.  Each range ends at the end of a run of
+    keyword lines, which is always between two entries, so the ranges can be parsed independently.
+
+    :param buffer: Bytes-like object holding the message catalog.
+    :param count: Number of ranges to aim for.
+    :returns: List of (start, end) tuples that cover the buffer in order.
+    """
+    size = len(buffer)
+    bounds = [0]
+    for idx in six.moves.range(1, count):
+        line_end = buffer.find(b"\n", max(size * idx // count, bounds[-1]))
+        if line_end < 0:
+            break
+        # The first run of keyword lines after the next line start.  The match always extends to the end of the run,
+        # even when the scan starts part way through it.
+        cut = next((end for is_entries, _, end in po.scan(buffer, line_end + 1) if is_entries), size)
+        if cut >= size:
+            break
+        bounds.append(cut)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _outputs_hash(filenames):
+    hashes = [manifest.file_hash(filename) for filename in filenames]
+    if None in hashes:
+        return None
+    return u":".join(hashes)
+
+
+def _find_catalogs(input_paths, output_root, locale=None):
+    """
+    Finds the message catalogs to pseudo-localize and works out where to write each of them.
+
+    :param input_paths: Directory or message catalog file, or a list of them.
+    :param output_root: Directory to write the pseudo-localized message catalogs to.
+    :param locale: Optional locale name for .pot templates.
+    :returns: Generator of (input_filename, output_filename) tuples.
+    """
+    if isinstance(input_paths, six.string_types):
+        input_paths = [input_paths]
+    for input_path in input_paths:
+        if os.path.isdir(input_path):
+            for dirpath, dirnames, filenames in os.walk(input_path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith((".po", ".pot")):
+                        relpath = os.path.relpath(os.path.join(dirpath, filename), input_path)
+                        yield os.path.join(dirpath, filename), _output_filename(relpath, output_root, locale)
+        else:
+            yield input_path, _output_filename(os.path.basename(input_path), output_root, locale)
+
+
+def _output_filename(relpath, output_root, locale):
+    basename, ext = os.path.splitext(relpath)
+    if ext != ".pot":
+        return os.path.join(output_root, relpath)
+    if locale:
+        return os.path.join(output_root, locale, "LC_MESSAGES", os.path.basename(basename) + ".po")
+    return os.path.join(output_root, basename + ".po")
+
+
+def _pseudolocalize_shard(job):
+    """
+    Worker for POFileUtil._pseudolocalize_sharded().
+
+    :param job: Tuple of (POFileUtil, input_filename, input_encoding, output_encoding, start offset, end offset).
+    :returns: Pseudo-localized byte range, in the output encoding.
+    """
+    pofileutil, input_filename, input_encoding, output_encoding, start, end = job
+    with io.open(input_filename, mode="rb") as in_fileobj:
+        in_fileobj.seek(start)
+        data = in_fileobj.read(end - start)
+    parts = [entry.format(pofileutil.pseudolocalizeentry(entry))
+             for entry in po.parse(po.split_lines(data.decode(input_encoding)))]
+    return u"".join(parts).encode(output_encoding)
+
+
+def _pseudolocalizefile_job(job):
+    """
+    Worker for POFileUtil.pseudolocalizetree().  Exceptions are caught and reported in the result so that one bad
+    catalog does not abort the whole run.
+
+    :param job: Tuple of (POFileUtil, input_filename, output_filename, keyword arguments for pseudolocalizefile).
+    :returns: FileResult named tuple.
+    """
+    pofileutil, input_filename, output_filename, kwargs = job
+    start = timeit.default_timer()
+    error = None
+    try:
+        output_dir = os.path.dirname(output_filename)
+        if output_dir and not os.path.isdir(output_dir):
+            try:
+                os.makedirs(output_dir)
+            except OSError:  # Another worker may have created it in the meantime.
+                if not os.path.isdir(output_dir):
+                    raise
+        pofileutil.pseudolocalizefile(input_filename, output_filename, **kwargs)
+    except Exception as e:
+        error = "{0}: {1}".format(type(e).__name__, e)
+    return FileResult(input_filename, output_filename, timeit.default_timer() - start, error)
@@ -0,0 +1,68 @@
+import gettext
+import io
+
+from . import po
+from .pseudol10nutil import PseudoL10nUtil
+
+
+class PseudoTranslations(gettext.NullTranslations):
+    """
+    gettext translations object that pseudo-localizes messages at runtime instead of looking them up in a compiled
+    catalog, so an application can be switched to a pseudo-locale without building or loading any PO or MO files::
+
+        PseudoTranslations().install()
+
+    Results are memoized in the bounded, thread-safe cache of the PseudoL10nUtil object, so the object can be shared
+    by all of the threads of an application.
+    """
+
+    def __init__(self, l10nutil=None, cache_size=10000):
+        """
+        Initializer for class.
+
+        :param l10nutil: Optional instance of PseudoL10nUtil object.  This can be used to pass in an instance of the
+                         PseudoL10nUtil class with the transforms and cache already configured.  Otherwise, an
+                         instance of the PseudoL10nUtil class will be created with the default transforms.
+        :param cache_size: Maximum number of pseudo-localized messages to keep, if l10nutil is not specified.
+        """
+        gettext.NullTranslations.__init__(self)
+        if not l10nutil:
+            self.l10nutil = PseudoL10nUtil(cache_size=cache_size)
+        else:
+            self.l10nutil = l10nutil
+
+    def gettext(self, message):
+        return self.l10nutil.pseudolocalize(message)
+
+    def ngettext(self, msgid1, msgid2, n):
+        return self.l10nutil.pseudolocalize(msgid1 if n == 1 else msgid2)
+
+    def pgettext(self, context, message):
+        return self.l10nutil.pseudolocalize(message)
+
+    def npgettext(self, context, msgid1, msgid2, n):
+        return self.l10nutil.pseudolocalize(msgid1 if n == 1 else msgid2)
+
+    # Python 2 spells the unicode variants differently.
+    ugettext = gettext
+    ungettext = ngettext
+
+    def warm(self, filename, encoding="UTF-8"):
+        """
+        Pseudo-localizes every message in a message catalog up front, so that the cache is already populated when
+        the application starts handling requests.
+
+        :param filename: Filename of a .pot template or .po message catalog.
+        :param encoding: Optional encoding of the file.  Default is 'UTF-8'.
+        :returns: Number of messages pseudo-localized.
+        """
+        count = 0
+        with io.open(filename, mode="r", encoding=encoding, newline="\n") as fileobj:
+            for entry in po.parse(fileobj):
+                if entry.msgid is None or entry.is_header:
+                    continue
+                for message in (entry.msgid, entry.msgid_plural):
+                    if message is not None:
+                        self.l10nutil.pseudolocalize(message)
+                        count += 1
+        return count
@@ -0,0 +1,152 @@
+import six
+
+from . import placeholders, transforms
+from .pseudol10nutil import _compose_tables
+
+try:
+    import numpy
+except ImportError:  # numpy is an optional dependency, only needed for this module.
+    numpy = None
+
+
+# Number of characters to convert to a code point array at a time, which bounds the memory used by large batches.
+_batch_chars = 1 << 22
+
+
+def available():
+    """
+    :returns: True if numpy is installed, so the functions in this module can be used.
+    """
+    return numpy is not None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("The vectorized backend requires numpy: pip install pseudol10nutil[numpy]")
+
+
+def _lookup_table(table):
+    """
+    Converts a str.translate() table into a dense array indexed by code point.
+    """
+    lut = numpy.arange(max(table) + 1, dtype=numpy.uint32)
+    lut[list(table)] = list(table.values())
+    return lut
+
+
+def _batches(strings):
+    batch = []
+    size = 0
+    for s in strings:
+        batch.append(s)
+        size += len(s) + 1
+        if size >= _batch_chars:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def _placeholder_mask(length, spans):
+    """
+    :returns: Boolean array that is True at the offsets that are inside one of the spans.
+    """
+    starts, ends = zip(*spans)
+    depth = numpy.zeros(length + 1, dtype=numpy.int32)
+    numpy.add.at(depth, list(starts), 1)
+    numpy.add.at(depth, list(ends), -1)
+    return numpy.cumsum(depth[:-1]) > 0
+
+
+def _transliterate_batch(batch, lut, matcher):
+    joined = u"\n".join(batch)
+    codes = numpy.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype="<u4").copy()
+    translatable = codes < len(lut)
+    if matcher is not None:
+        spans = [match.span() for match in matcher.finditer(joined)]
+        if spans:
+            protected = _placeholder_mask(len(codes), spans)
+            # Offsets of the newlines that the strings were joined with.
+            separators = numpy.cumsum([len(s) + 1 for s in batch[:-1]], dtype=numpy.int64) - 1
+            if len(separators) and protected[separators].any():
+                # Some grammars (e.g. HTML tags) can match a newline, so a placeholder spanning two strings means
+                # each string has to be scanned on its own.
+                spans = []
+                offset = 0
+                for s in batch:
+                    if s:
+                        spans.extend((offset + match.start(), offset + match.end()) for match in matcher.finditer(s))
+                    offset += len(s) + 1
+                protected = _placeholder_mask(len(codes), spans) if spans else numpy.zeros(len(codes), dtype=bool)
+            translatable &= ~protected
+    codes[translatable] = lut[codes[translatable]]
+    # Transliteration maps one code point to one code point, so every string keeps its offset.
+    result = codes.tobytes().decode("utf-32-le", "surrogatepass")
+    pieces = []
+    start = 0
+    for s in batch:
+        end = start + len(s)
+        pieces.append(result[start:end])
+        start = end + 1
+    return pieces
+
+
+def transliterate_many(strings, table, protect_placeholders=True, placeholder_grammars=None):
+    """
+    Applies a transliteration table to a batch of strings at once.  The batch is converted to a single array of code
+    points, the table is applied with one array lookup and the result is split back into strings, so the cost per
+    string is far lower than calling str.translate() on each one.
+
+    :param strings: Iterable of strings.
+    :param table: str.translate() table mapping code points to code points e.g. transforms._DIACRITIC_TABLE.
+    :param protect_placeholders: Boolean indicating if format specifiers (e.g. '{name}' or '%(count)d') should be
+                                 left alone.  True by default.
+    :param placeholder_grammars: Optional list of names of the placeholder grammars to leave alone, as for
+                                 PseudoL10nUtil.  Defaults to str.format() fields and printf-style specifiers.
+    :returns: List of transliterated strings, in input order.
+    :raises ImportError: If numpy is not installed.
+    :raises ValueError: If a placeholder grammar is not registered.
+    """
+    _require_numpy()
+    lut = _lookup_table(table)
+    matcher = placeholders.compile_matcher(placeholder_grammars) if protect_placeholders else None
+    result = []
+    for batch in _batches(strings):
+        result.extend(_transliterate_batch(batch, lut, matcher))
+    return result
+
+
+def pseudolocalize_many(pipeline, strings):
+    """
+    Performs pseudo-localization on a batch of strings, doing the transliterations for the whole batch at once with
+    transliterate_many() and the remaining transforms (padding, brackets, etc.) string by string.  The results are
+    the same as calling the pipeline on each string.  Pipelines where a transliteration comes after another kind of
+    transform, or that have an observer, are run string by string.
+
+    :param pipeline: CompiledPipeline e.g. PseudoL10nUtil().compile().
+    :param strings: Iterable of strings.
+    :returns: List of pseudo-localized strings, in input order.
+    :raises ImportError: If numpy is not installed.
+    """
+    _require_numpy()
+    strings = list(strings)
+    for s in strings:
+        if s and not isinstance(s, six.text_type):
+            raise TypeError("String to pseudo-localize must be of type '{0}'.".format(six.text_type.__name__))
+    is_transliteration = [munge in transforms._transliterations for munge in pipeline.transforms]
+    count = is_transliteration.index(False) if False in is_transliteration else len(is_transliteration)
+    if any(is_transliteration[count:]) or pipeline.observer is not None:
+        return [pipeline(s) for s in strings]
+    texts = [s or u"" for s in strings]
+    if count:
+        table = _compose_tables([transforms._transliteration_tables[munge] for munge in pipeline.transforms[:count]])
+        texts = transliterate_many(texts, table, placeholder_grammars=pipeline.placeholder_grammars)
+    post_steps = pipeline._post_steps
+    result = []
+    for text in texts:
+        if text:
+            for step in post_steps:
+                text = step(text)
+        result.append(text)
+    return result
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+import xml.sax
+import xml.sax.handler
+import xml.sax.saxutils
+
+import six
+
+
+# Elements that hold the source and target of a translation: trans-unit in XLIFF 1.2 and segment in XLIFF 2.0.
+_unit_elements = frozenset(["trans-unit", "segment"])
+# Elements whose translate attribute can exclude a whole unit from translation.  The value is inherited from the
+# enclosing group (XLIFF 1.2 and 2.0) or file (XLIFF 2.0) when the attribute is not specified.
+_translatable_elements = frozenset(["file", "group", "trans-unit", "unit"])
+# Inline elements whose content is native code rather than text, and so is protected as a whole.
+_opaque_elements = frozenset(["ph", "bpt", "ept", "it"])
+# Characters used to stand in for inline markup while a string is pseudo-localized.
+_placeholder_range = six.moves.range(0xE000, 0xF900)  # Private Use Area
+
+_attribute_entities = {u'"': u"&quot;", u"\n": u"&#10;", u"\r": u"&#13;", u"\t": u"&#9;"}
+
+
+def _local_name(qname):
+    return qname.rsplit(u":", 1)[-1]
+
+
+def _escape_text(s):
+    # Most text has nothing to escape, and checking is much cheaper than escaping.
+    if u"&" in s or u"<" in s or u">" in s:
+        return xml.sax.saxutils.escape(s)
+    return s
+
+
+def _start_tag(qname, attrs, empty=False):
+    parts = [u"<", qname]
+    for name, value in attrs:
+        parts.append(u' {0}="{1}"'.format(name, xml.sax.saxutils.escape(value, _attribute_entities)))
+    parts.append(u"/>" if empty else u">")
+    return u"".join(parts)
+
+
+def _serialize(events):
+    """
+    Converts captured events back into markup.
+
+    :param events: List of ('start', qname, attrs), ('end', qname), ('text', s) or ('raw', markup) tuples.
+    :returns: Markup.
+    """
+    parts = []
+    for idx, event in enumerate(events):
+        kind = event[0]
+        if kind == "start":
+            empty = idx + 1 < len(events) and events[idx + 1] == ("end", event[1])
+            parts.append(_start_tag(event[1], event[2], empty))
+        elif kind == "end":
+            if not (idx and events[idx - 1][0] == "start" and events[idx - 1][1] == event[1]):
+                parts.append(u"</{0}>".format(event[1]))
+        elif kind == "text":
+            parts.append(_escape_text(event[1]))
+        else:
+            parts.append(event[1])
+    return u"".join(parts)
+
+
+def pseudolocalize_content(events, pseudolocalize):
+    """
+    Pseudo-localizes the content of a source element.  Each inline element tag (e.g. <x/>, <g>, </g>) and each
+    opaque inline element (e.g. <ph>...</ph>) is replaced with a placeholder character from the Unicode Private Use
+    Area, so that the transforms leave the markup alone in the same way they leave format specifiers alone.
+
+    :param events: List of events captured from the content of the source element, as used by _serialize().
+    :param pseudolocalize: Function that pseudo-localizes a string.
+    :returns: Markup for the content of the target element.
+    """
+    pieces = []  # Text strings, or 1-lists holding markup.
+    idx = 0
+    while idx < len(events):
+        event = events[idx]
+        if event[0] == "text":
+            pieces.append(event[1])
+        elif event[0] == "start" and _local_name(event[1]) in _opaque_elements:
+            depth = 0
+            end = idx
+            while True:
+                if events[end][0] == "start":
+                    depth += 1
+                elif events[end][0] == "end":
+                    depth -= 1
+                    if not depth:
+                        break
+                end += 1
+            pieces.append([_serialize(events[idx:end + 1])])
+            idx = end
+        elif event[0] == "start" and idx + 1 < len(events) and events[idx + 1] == ("end", event[1]):
+            pieces.append([_start_tag(event[1], event[2], empty=True)])
+            idx += 1
+        else:
+            pieces.append([_serialize([event])])
+        idx += 1
+    markup = [piece[0] for piece in pieces if isinstance(piece, list)]
+    text = u"".join(piece for piece in pieces if not isinstance(piece, list))
+    if not markup:
+        return _escape_text(pseudolocalize(text))
+    placeholders = (six.unichr(code) for code in _placeholder_range if six.unichr(code) not in text)
+    replacements = []
+    source = []
+    for piece in pieces:
+        if isinstance(piece, list):
+            try:
+                placeholder = next(placeholders)
+            except StopIteration:
+                raise ValueError("Too many inline elements in string: {0}".format(text))
+            replacements.append((placeholder, piece[0]))
+            source.append(placeholder)
+        else:
+            source.append(piece)
+    # Escaping leaves the placeholder characters alone, so the markup can be put back afterwards.
+    result = _escape_text(pseudolocalize(u"".join(source)))
+    for placeholder, markup in replacements:
+        result = result.replace(placeholder, markup)
+    return result
+
+
+class XLIFFRewriter(xml.sax.handler.ContentHandler):
+    """
+    SAX handler that copies an XLIFF 1.2 or 2.0 document to the output as it is parsed, replacing the target of each
+    translation unit with the pseudo-localized source.  Only the source element of the unit currently being parsed is
+    held in memory, so documents of any size can be processed.  Units with translate="no", or inside a group or file
+    with translate="no", are copied as-is, and a target element is added to units that do not have one.
+    """
+
+    def __init__(self, pseudolocalize, write, encoding="UTF-8"):
+        """
+        Initializer for class.
+
+        :param pseudolocalize: Function that pseudo-localizes a string.
+        :param write: Function that writes a string to the output.
+        :param encoding: Encoding to declare in the XML declaration of the output.
+        """
+        xml.sax.handler.ContentHandler.__init__(self)
+        self._pseudolocalize = pseudolocalize
+        self._write = write
+        self._encoding = encoding
+        self._stack = []  # Local names of the open elements.
+        self._translate = [True]  # Whether each open file, group and unit (or the document) is translatable.
+        self._pending = None  # Start tag not written yet, in case the element turns out to be empty.
+        self._whitespace = u""  # Whitespace written since the last tag.
+        self._capture = None  # Events in the source element being parsed.
+        self._source = None  # (qname, indentation, target markup) of the unit's source, until the target is written.
+        self._buffer = None  # Output held back until it is known whether the unit has a target.
+        self._skip_depth = 0  # Depth inside an existing target element, which is being replaced.
+        self._target_written = False
+
+    def _out(self, s):
+        if self._buffer is not None:
+            self._buffer.append(s)
+        else:
+            self._write(s)
+
+    def _flush_pending(self, empty=False):
+        if self._pending is not None:
+            qname, attrs = self._pending
+            self._pending = None
+            self._out(_start_tag(qname, attrs, empty))
+
+    def _release_buffer(self):
+        buffered, self._buffer = self._buffer, None
+        for s in buffered:
+            self._write(s)
+
+    def _write_target(self):
+        qname, indentation, content = self._source
+        target = qname[:-len(u"source")] + u"target"
+        self._write(u"{0}<{1}>{2}</{1}>".format(indentation, target, content))
+        self._source = None
+        self._target_written = True
+
+    def startDocument(self):
+        self._write(u'<?xml version="1.0" encoding="{0}"?>\n'.format(self._encoding))
+
+    def endDocument(self):
+        self._write(u"\n")
+
+    def startElement(self, qname, attrs):
+        name = _local_name(qname)
+        # The parser only keeps the source order of attributes on Python 3, so they are sorted on Python 2 to keep the
+        # output the same from one run to the next.
+        attrs = sorted(attrs.items()) if six.PY2 else list(attrs.items())
+        if self._skip_depth:
+            self._skip_depth += 1
+            self._stack.append(name)
+            return
+        self._flush_pending()
+        parent = self._stack[-1] if self._stack else None
+        if self._source is not None and self._buffer is not None:
+            if name == u"target":
+                # Replace the existing target, keeping its attributes.
+                self._release_buffer()
+                self._write(_start_tag(qname, attrs) + self._source[2] + u"</{0}>".format(qname))
+                self._source = None
+                self._target_written = True
+                self._skip_depth = 1
+                self._stack.append(name)
+                return
+            if name == u"seg-source":
+                self._release_buffer()
+            else:
+                self._write_target()
+                self._release_buffer()
+        elif name == u"target" and parent in _unit_elements and self._target_written:
+            # A target that does not directly follow the source, after one has already been added.
+            self._skip_depth = 1
+            self._stack.append(name)
+            return
+        if name in _translatable_elements:
+            translate = dict(attrs).get(u"translate")
+            self._translate.append(self._translate[-1] if translate is None else translate != u"no")
+        if name in _unit_elements:
+            self._target_written = False
+        if self._capture is not None:
+            self._capture.append(("start", qname, attrs))
+        elif name == u"source" and parent in _unit_elements and self._translate[-1]:
+            self._capture = []
+            self._source = (qname, self._whitespace, None)
+        self._pending = (qname, attrs)
+        self._whitespace = u""
+        self._stack.append(name)
+
+    def endElement(self, qname):
+        name = self._stack.pop()
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        if self._capture is not None and name == u"source" and self._source is not None \
+                and self._source[0] == qname and self._stack[-1] in _unit_elements:
+            content = pseudolocalize_content(self._capture, self._pseudolocalize)
+            self._source = (self._source[0], self._source[1], content)
+            self._capture = None
+            self._close(qname)
+            self._buffer = []
+            return
+        if self._capture is not None:
+            self._capture.append(("end", qname))
+        if name in _unit_elements and self._source is not None and self._buffer is not None:
+            self._write_target()
+            self._release_buffer()
+        self._close(qname)
+        if name == u"seg-source" and self._source is not None:
+            self._buffer = []
+        if name in _translatable_elements:
+            self._translate.pop()
+
+    def _close(self, qname):
+        if self._pending is not None and self._pending[0] == qname:
+            self._flush_pending(empty=True)
+        else:
+            self._out(u"</{0}>".format(qname))
+        self._whitespace = u""
+
+    def characters(self, content):
+        if self._skip_depth:
+            return
+        if self._capture is not None:
+            self._capture.append(("text", content))
+        self._flush_pending()
+        self._out(_escape_text(content))
+        self._whitespace = self._whitespace + content if not content.strip() else u""
+
+    ignorableWhitespace = characters
+
+    def processingInstruction(self, target, data):
+        self._markup(u"<?{0} {1}?>".format(target, data) if data else u"<?{0}?>".format(target))
+
+    def comment(self, content):
+        self._markup(u"<!--{0}-->".format(content))
+
+    def _markup(self, markup):
+        if self._skip_depth:
+            return
+        if self._capture is not None:
+            self._capture.append(("raw", markup))
+        self._flush_pending()
+        # Whitespace outside the root element is not reported by the parser, so put each item on its own line.
+        self._out(markup if self._stack else markup + u"\n")
+
+    def startDTD(self, name, public_id, system_id):
+        if public_id:
+            self._write(u'<!DOCTYPE {0} PUBLIC "{1}" "{2}">\n'.format(name, public_id, system_id))
+        elif system_id:
+            self._write(u'<!DOCTYPE {0} SYSTEM "{1}">\n'.format(name, system_id))
+        else:
+            self._write(u"<!DOCTYPE {0}>\n".format(name))
+
+    def endDTD(self):
+        pass
+
+    def startEntity(self, name):
+        pass
+
+    def endEntity(self, name):
+        pass
+
+    def startCDATA(self):
+        pass
+
+    def endCDATA(self):
+        pass
+
+
+def make_parser(handler):
+    """
+    Creates a SAX parser for rewriting an XLIFF document.  Namespace processing is turned off so that element and
+    attribute names (and xmlns declarations) are written back out exactly as they were read, and external entities
+    are never fetched.
+
+    :param handler: XLIFFRewriter object.
+    :returns: Incremental SAX parser; pass the document to its feed() method in chunks, then call close().
+    """
+    parser = xml.sax.make_parser()
+    parser.setFeature(xml.sax.handler.feature_namespaces, False)
+    parser.setFeature(xml.sax.handler.feature_external_ges, False)
+    parser.setContentHandler(handler)
+    parser.setProperty(xml.sax.handler.property_lexical_handler, handler)
+    return parser
@@ -36,4 +36,10 @@ setup(name='pseudol10nutil',
       install_requires=[
             'six',
       ],
+      extras_require={
+            'numpy': ['numpy'],
+      },
+      entry_points={
+            'console_scripts': ['pseudol10n = pseudol10nutil.cli:main'],
+      },
       zip_safe=False)
@@ -1,11 +1,34 @@
 # -*- coding: utf-8 -*-
 
 import filecmp
+import gettext
+import io
 import os.path
+import pickle
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import xml.etree.ElementTree
 
-from pseudol10nutil import POFileUtil, PseudoL10nUtil
+import six
+
+from pseudol10nutil import CompiledPipeline, PipelineStats, POFileUtil, PseudoL10nUtil, PseudoTranslations, XLIFFFileUtil
+import pseudol10nutil.cli
+import pseudol10nutil.mo
+import pseudol10nutil.placeholders
+import pseudol10nutil.po
+import pseudol10nutil.pseudol10nutil
 import pseudol10nutil.transforms
+import pseudol10nutil.vectorized
+
+if six.PY3:
+    import asyncio
+    import pseudol10nutil.aio
 
 
 class TestPOFileUtil(unittest.TestCase):
@@ -22,6 +45,465 @@ class TestPOFileUtil(unittest.TestCase):
         self.assertTrue(filecmp.cmp(expected_file, generated_file))
         os.remove(generated_file)
 
+    def test_generate_pseudolocalized_po_full_grammar(self):
+        input_file = "./testdata/locales/grammar.pot"
+        expected_file = "./testdata/locales/eo/LC_MESSAGES/grammar.po"
+        basename, ext = os.path.splitext(expected_file)
+        generated_file = basename + "_generated" + ext
+        self.pofileutil.pseudolocalizefile(input_file, generated_file)
+        self.assertTrue(filecmp.cmp(expected_file, generated_file))
+        os.remove(generated_file)
+
+    def test_generate_pseudolocalized_po_bulk_io(self):
+        for domain in ["helloworld", "grammar"]:
+            input_file = "./testdata/locales/{0}.pot".format(domain)
+            expected_file = "./testdata/locales/eo/LC_MESSAGES/{0}.po".format(domain)
+            basename, ext = os.path.splitext(expected_file)
+            generated_file = basename + "_generated" + ext
+            self.pofileutil.pseudolocalizefile(input_file, generated_file, bulk_io=True)
+            self.assertTrue(filecmp.cmp(expected_file, generated_file))
+            os.remove(generated_file)
+
+    def test_bulk_io_mixed_newlines(self):
+        # Comments and blank lines are copied through by the memory-mapped path, so the line terminator of each
+        # entry has to come from its keyword lines.
+        passthrough_size = pseudol10nutil.pseudol10nutil._bulk_passthrough_size
+        pseudol10nutil.pseudol10nutil._bulk_passthrough_size = 1
+        temp_dir = tempfile.mkdtemp()
+        try:
+            input_file = os.path.join(temp_dir, "mixed.pot")
+            with io.open(input_file, mode="wb") as fileobj:
+                fileobj.write(b'msgid ""\r\nmsgstr ""\r\n"Content-Type: text/plain; charset=UTF-8\\n"\r\n\n'
+                              b'# Comment\n\nmsgid "Hello"\r\nmsgstr ""\r\n\r\n'
+                              b'#: main.py:1\r\nmsgid "Bye"\nmsgstr ""\n')
+            streamed_file = os.path.join(temp_dir, "streamed.po")
+            bulk_file = os.path.join(temp_dir, "bulk.po")
+            self.pofileutil.pseudolocalizefile(input_file, streamed_file)
+            self.pofileutil.pseudolocalizefile(input_file, bulk_file, bulk_io=True)
+            self.assertTrue(filecmp.cmp(streamed_file, bulk_file, shallow=False))
+            with io.open(bulk_file, mode="rb") as fileobj:
+                data = fileobj.read()
+            self.assertIn(b'msgid "Hello"\r\nmsgstr "', data)
+            self.assertTrue(data.endswith(b'\xa7\xe2\x9f\xa7"\n'))
+        finally:
+            pseudol10nutil.pseudol10nutil._bulk_passthrough_size = passthrough_size
+            shutil.rmtree(temp_dir)
+
+    def test_scan(self):
+        with io.open("./testdata/locales/grammar.pot", mode="rb") as fileobj:
+            data = fileobj.read()
+        regions = list(pseudol10nutil.po.scan(data))
+        self.assertEqual(len(data), sum(end - start for _, start, end in regions))
+        self.assertEqual([False, True] * 6 + [False], [is_entries for is_entries, _, _ in regions])
+        self.assertTrue(data[regions[-1][1]:regions[-1][2]].endswith(b'#~ msgstr "Obsolete"\n'))
+
+    def test_pseudolocalizetree(self):
+        output_root = tempfile.mkdtemp()
+        try:
+            input_files = ["./testdata/locales/helloworld.pot", "./testdata/locales/missing.pot",
+                           "./testdata/locales/grammar.pot"]
+            results = self.pofileutil.pseudolocalizetree(input_files, output_root, locale="eo", workers=2)
+            self.assertEqual(input_files, [result.input_filename for result in results])
+            self.assertIsNone(results[0].error)
+            self.assertIn("not found", results[1].error)
+            self.assertIsNone(results[2].error)
+            for domain in ["helloworld", "grammar"]:
+                expected_file = "./testdata/locales/eo/LC_MESSAGES/{0}.po".format(domain)
+                generated_file = os.path.join(output_root, "eo", "LC_MESSAGES", domain + ".po")
+                self.assertTrue(filecmp.cmp(expected_file, generated_file))
+        finally:
+            shutil.rmtree(output_root)
+
+    def test_pseudolocalizetree_unpicklable(self):
+        # Transforms that cannot be sent to the workers are run in the current process instead.
+        pofileutil = POFileUtil(PseudoL10nUtil([lambda s: s.upper(), "square"]))
+        output_root = tempfile.mkdtemp()
+        try:
+            input_files = ["./testdata/locales/helloworld.pot", "./testdata/locales/grammar.pot"]
+            results = pofileutil.pseudolocalizetree(input_files, output_root, workers=2)
+            self.assertEqual([None, None], [result.error for result in results])
+            for result in results:
+                expected_file = result.output_filename + ".expected"
+                pofileutil.pseudolocalizefile(result.input_filename, expected_file)
+                self.assertTrue(filecmp.cmp(expected_file, result.output_filename, shallow=False))
+        finally:
+            shutil.rmtree(output_root)
+
+    def test_cli(self):
+        output_root = tempfile.mkdtemp()
+        try:
+            stderr = sys.stderr
+            sys.stderr = six.StringIO()
+            try:
+                status = pseudol10nutil.cli.main(["./testdata/locales/helloworld.pot", "-o", output_root, "-j", "1"])
+            finally:
+                sys.stderr = stderr
+            self.assertEqual(0, status)
+            self.assertTrue(filecmp.cmp("./testdata/locales/eo/LC_MESSAGES/helloworld.po",
+                                        os.path.join(output_root, "helloworld.po")))
+        finally:
+            shutil.rmtree(output_root)
+
+    def test_cli_stdin(self):
+        command = [sys.executable, "-m", "pseudol10nutil", "-t", "fullwidth,angle", "--stats"]
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate(u"Hello {0}!\r\n\nBye\n".encode("utf-8"))
+        self.assertEqual(0, process.returncode)
+        self.assertEqual(u"\u300aＨｅｌｌｏ {0}!\u300b\r\n\n\u300aＢｙｅ\u300b\n", stdout.decode("utf-8"))
+        self.assertIn(b"3 line(s)", stderr)
+        self.assertIn(b"transliterate_fullwidth", stderr)
+        command = [sys.executable, "-m", "pseudol10nutil", "-f", "po"]
+        with open("./testdata/locales/helloworld.pot", mode="rb") as fileobj:
+            stdout = subprocess.check_output(command, stdin=fileobj)
+        with open("./testdata/locales/eo/LC_MESSAGES/helloworld.po", mode="rb") as fileobj:
+            self.assertEqual(fileobj.read(), stdout)
+
+    def test_cli_arguments(self):
+        stdout = sys.stdout
+        stderr = sys.stderr
+        sys.stdout = six.StringIO()
+        sys.stderr = six.StringIO()
+        try:
+            self.assertEqual(0, pseudol10nutil.cli.main(["--list-transforms"]))
+            self.assertEqual(pseudol10nutil.transforms.names(), sys.stdout.getvalue().split())
+            self.assertRaises(SystemExit, pseudol10nutil.cli.main, ["-t", "bogus"])
+            self.assertRaises(SystemExit, pseudol10nutil.cli.main, ["./testdata/locales/helloworld.pot"])
+        finally:
+            sys.stdout = stdout
+            sys.stderr = stderr
+
+    def test_pseudolocalizevariants(self):
+        variants = [
+            ("diacritic", PseudoL10nUtil()),
+            ("fullwidth", PseudoL10nUtil(["fullwidth", "square"])),
+            ("jinja", PseudoL10nUtil(["circled"], placeholder_grammars=["jinja", "printf"])),
+            ("stats", PseudoL10nUtil(["pad"], observer=PipelineStats())),
+            ("none", PseudoL10nUtil([])),
+        ]
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for input_file in ["./testdata/locales/grammar.pot", "./testdata/locales/helloworld.pot"]:
+                outputs = [(os.path.join(temp_dir, name + ".po"), l10nutil) for name, l10nutil in variants]
+                self.pofileutil.pseudolocalizevariants(input_file, outputs)
+                for output_file, l10nutil in outputs:
+                    expected_file = output_file + ".expected"
+                    POFileUtil(l10nutil).pseudolocalizefile(input_file, expected_file)
+                    self.assertTrue(filecmp.cmp(expected_file, output_file, shallow=False))
+            self.assertRaises(IOError, self.pofileutil.pseudolocalizevariants, "./testdata/locales/grammar.pot",
+                              dict(outputs), overwrite_existing=False)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_sharded(self):
+        shard_min_size = pseudol10nutil.pseudol10nutil._shard_min_size
+        pseudol10nutil.pseudol10nutil._shard_min_size = 64
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for input_file in ["./testdata/locales/grammar.pot", "./testdata/locales/helloworld.pot"]:
+                expected_file = os.path.join(temp_dir, "expected.po")
+                output_file = os.path.join(temp_dir, "sharded.po")
+                self.pofileutil.pseudolocalizefile(input_file, expected_file)
+                self.pofileutil.pseudolocalizefile(input_file, output_file, workers=3)
+                self.assertTrue(filecmp.cmp(expected_file, output_file, shallow=False))
+            with open("./testdata/locales/grammar.pot", mode="rb") as fileobj:
+                data = fileobj.read()
+            shards = pseudol10nutil.pseudol10nutil._shard_ranges(data, 4)
+            self.assertTrue(len(shards) > 1)
+            self.assertEqual(data, b"".join(data[start:end] for start, end in shards))
+        finally:
+            pseudol10nutil.pseudol10nutil._shard_min_size = shard_min_size
+            shutil.rmtree(temp_dir)
+
+    def test_sharded_unpicklable(self):
+        # Transforms that cannot be sent to the workers are run in the current process instead.
+        pofileutil = POFileUtil(PseudoL10nUtil([lambda s: s.upper(), "square"]))
+        shard_min_size = pseudol10nutil.pseudol10nutil._shard_min_size
+        pseudol10nutil.pseudol10nutil._shard_min_size = 64
+        temp_dir = tempfile.mkdtemp()
+        try:
+            expected_file = os.path.join(temp_dir, "expected.po")
+            pofileutil.pseudolocalizefile("./testdata/locales/grammar.pot", expected_file)
+            results = pofileutil.pseudolocalizetree("./testdata/locales/grammar.pot", temp_dir, workers=4)
+            self.assertEqual([None], [result.error for result in results])
+            self.assertTrue(filecmp.cmp(expected_file, results[0].output_filename, shallow=False))
+        finally:
+            pseudol10nutil.pseudol10nutil._shard_min_size = shard_min_size
+            shutil.rmtree(temp_dir)
+
+    def test_incremental(self):
+        calls = []
+
+        def counting(s):
+            calls.append(s)
+            return s.upper()
+
+        pofileutil = POFileUtil(PseudoL10nUtil([counting]))
+        temp_dir = tempfile.mkdtemp()
+        try:
+            input_file = os.path.join(temp_dir, "grammar.pot")
+            output_file = os.path.join(temp_dir, "grammar.po")
+            shutil.copy("./testdata/locales/grammar.pot", input_file)
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual(6, len(calls))
+            self.assertTrue(os.path.isfile(output_file + ".pseudol10n.json"))
+            # Nothing changed, so the file is skipped.
+            del calls[:]
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual([], calls)
+            # Only the changed entry is pseudo-localized again.
+            with io.open(input_file, encoding="UTF-8") as fileobj:
+                contents = fileobj.read()
+            with io.open(input_file, mode="w", encoding="UTF-8") as fileobj:
+                fileobj.write(contents.replace(u'msgid "Tab\\tseparated"', u'msgid "Space separated"'))
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual([u"Space separated"], calls)
+            with io.open(output_file, encoding="UTF-8") as fileobj:
+                contents = fileobj.read()
+            self.assertIn(u'msgstr "SPACE SEPARATED"', contents)
+            self.assertIn(u'msgstr[1] "%(COUNT)D FILES"', contents)
+            # Changing the transforms invalidates everything.
+            del calls[:]
+            pofileutil.l10nutil = PseudoL10nUtil([counting, pseudol10nutil.transforms.square_brackets])
+            pofileutil.pseudolocalizefile(input_file, output_file, incremental=True)
+            self.assertEqual(6, len(calls))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_generate_mo(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            po_file = os.path.join(temp_dir, "grammar.po")
+            mo_file = os.path.join(temp_dir, "grammar.mo")
+            self.pofileutil.pseudolocalizefile("./testdata/locales/grammar.pot", po_file, mo_filename=mo_file)
+            self.assertTrue(filecmp.cmp("./testdata/locales/eo/LC_MESSAGES/grammar.po", po_file))
+            with io.open(mo_file, mode="rb") as fileobj:
+                translations = gettext.GNUTranslations(fileobj)
+            # gettext() and ngettext() return encoded strings on Python 2.
+            lookup = translations.ugettext if six.PY2 else translations.gettext
+            lookup_plural = translations.ungettext if six.PY2 else translations.ngettext
+            util = PseudoL10nUtil()
+            self.assertEqual(util.pseudolocalize(u"Open"), lookup(u"menu\x04Open"))
+            self.assertEqual(util.pseudolocalize(u"%(count)d files"),
+                             lookup_plural(u"%(count)d file", u"%(count)d files", 2))
+            self.assertEqual(u"text/plain; charset=UTF-8", translations.info()["content-type"])
+
+            os.remove(mo_file)
+            self.pofileutil.pseudolocalizemofile("./testdata/locales/grammar.pot", mo_file)
+            with io.open(mo_file, mode="rb") as fileobj:
+                data = fileobj.read()
+            # Every message must be reachable through the hash table.
+            magic, _, count, originals_offset, _, hash_size, hash_offset = struct.unpack("=7I", data[:28])
+            self.assertEqual(0x950412de, magic)
+            self.assertEqual(6, count)
+            for idx in range(count):
+                length, offset = struct.unpack("=2I", data[originals_offset + idx * 8:originals_offset + idx * 8 + 8])
+                hash_value = pseudol10nutil.mo.hash_string(data[offset:offset + length])
+                bucket = hash_value % hash_size
+                increment = 1 + hash_value % (hash_size - 2)
+                while True:
+                    found = struct.unpack("=I", data[hash_offset + bucket * 4:hash_offset + bucket * 4 + 4])[0]
+                    self.assertNotEqual(0, found)
+                    if found == idx + 1:
+                        break
+                    bucket = (bucket + increment) % hash_size
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_parse(self):
+        with io.open("./testdata/locales/grammar.pot", encoding="UTF-8") as fileobj:
+            entries = list(pseudol10nutil.po.parse(fileobj))
+        self.assertEqual(7, len(entries))
+        self.assertTrue(entries[0].is_header)
+        self.assertEqual((u"menu", u"Open"), (entries[1].msgctxt, entries[1].msgid))
+        self.assertEqual(u"%(count)d files", entries[3].msgid_plural)
+        self.assertEqual([u"", u""], entries[3].msgstr)
+        self.assertEqual(u'This is a long message that\nspans "several" lines.\n', entries[4].msgid)
+        self.assertEqual(u"Tab\tseparated", entries[5].msgid)
+        self.assertIsNone(entries[6].msgid)
+
+
+@unittest.skipUnless(six.PY3, "asyncio needs Python 3")
+class TestAsyncPOFileUtil(unittest.TestCase):
+
+    def setUp(self):
+        self.util = pseudol10nutil.aio.AsyncPOFileUtil(concurrency=2)
+        self.temp_dir = tempfile.mkdtemp()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        self.util.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_pseudolocalizefile(self):
+        output_file = os.path.join(self.temp_dir, "helloworld.po")
+        self.loop.run_until_complete(self.util.pseudolocalizefile("./testdata/locales/helloworld.pot", output_file))
+        self.assertTrue(filecmp.cmp("./testdata/locales/eo/LC_MESSAGES/helloworld.po", output_file, shallow=False))
+        self.assertRaises(IOError, self.loop.run_until_complete,
+                          self.util.pseudolocalizefile("./testdata/locales/helloworld.pot", output_file,
+                                                       overwrite_existing=False))
+
+    def test_pseudolocalizefiles(self):
+        files = [(os.path.join("./testdata/locales", name + ".pot"), os.path.join(self.temp_dir, name + ".po"))
+                 for name in ["grammar", "missing", "helloworld"]]
+        results = self.loop.run_until_complete(self.util.pseudolocalizefiles(files))
+        self.assertEqual(files, [(result.input_filename, result.output_filename) for result in results])
+        self.assertEqual([None, None], [results[0].error, results[2].error])
+        self.assertIn("not found", results[1].error)
+        for name in ["grammar", "helloworld"]:
+            self.assertTrue(filecmp.cmp(os.path.join("./testdata/locales/eo/LC_MESSAGES", name + ".po"),
+                                        os.path.join(self.temp_dir, name + ".po"), shallow=False))
+
+    def test_cancel(self):
+        def slow(s):
+            time.sleep(0.01)
+            return s
+
+        util = pseudol10nutil.aio.AsyncPOFileUtil(PseudoL10nUtil([slow]))
+        output_file = os.path.join(self.temp_dir, "grammar.po")
+        chunk_entries = pseudol10nutil.aio._chunk_entries
+        pseudol10nutil.aio._chunk_entries = 1
+        try:
+            task = self.loop.create_task(util.pseudolocalizefile("./testdata/locales/grammar.pot", output_file))
+            while not os.path.isfile(output_file):
+                self.loop.run_until_complete(asyncio.sleep(0.001))
+            task.cancel()
+            self.assertRaises(asyncio.CancelledError, self.loop.run_until_complete, task)
+        finally:
+            pseudol10nutil.aio._chunk_entries = chunk_entries
+            util.close()
+        self.assertFalse(os.path.exists(output_file))
+
+
+class TestXLIFFFileUtil(unittest.TestCase):
+
+    def setUp(self):
+        self.xlifffileutil = XLIFFFileUtil()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _tree(self, filename):
+        def convert(element):
+            return element.tag, sorted(element.attrib.items()), element.text, element.tail, [
+                convert(child) for child in element]
+        return convert(xml.etree.ElementTree.parse(filename).getroot())
+
+    def test_generate_pseudolocalized_xliff(self):
+        for name in ["messages", "messages20"]:
+            input_file = "./testdata/xliff/{0}.xlf".format(name)
+            expected_file = "./testdata/xliff/eo/{0}.xlf".format(name)
+            generated_file = os.path.join(self.temp_dir, "{0}.xlf".format(name))
+            self.xlifffileutil.pseudolocalizefile(input_file, generated_file)
+            self.assertEqual(self._tree(expected_file), self._tree(generated_file))
+            if six.PY3:
+                # The source order of attributes is only kept on Python 3.
+                self.assertTrue(filecmp.cmp(expected_file, generated_file))
+
+    def test_translate_inherited(self):
+        input_file = os.path.join(self.temp_dir, "input.xlf")
+        generated_file = os.path.join(self.temp_dir, "output.xlf")
+        with io.open(input_file, mode="w", encoding="UTF-8") as fileobj:
+            fileobj.write(u'<xliff version="1.2"><file><body>'
+                          u'<group translate="no"><trans-unit id="1"><source>One</source></trans-unit>'
+                          u'<trans-unit id="2" translate="yes"><source>Two</source></trans-unit></group>'
+                          u'<trans-unit id="3"><source>Three</source></trans-unit>'
+                          u'</body></file></xliff>')
+        self.xlifffileutil.pseudolocalizefile(input_file, generated_file)
+        units = xml.etree.ElementTree.parse(generated_file).getroot().findall(".//trans-unit")
+        self.assertEqual([None, self.xlifffileutil.l10nutil.pseudolocalize(u"Two"),
+                          self.xlifffileutil.l10nutil.pseudolocalize(u"Three")],
+                         [unit.findtext("target") for unit in units])
+        with io.open(input_file, mode="w", encoding="UTF-8") as fileobj:
+            fileobj.write(u'<xliff xmlns="urn:oasis:names:tc:xliff:document:2.0" version="2.0" srcLang="en">'
+                          u'<file id="f1" translate="no"><unit id="1"><segment><source>One</source></segment></unit>'
+                          u'</file></xliff>')
+        self.xlifffileutil.pseudolocalizefile(input_file, generated_file)
+        with io.open(generated_file, mode="r", encoding="UTF-8") as fileobj:
+            self.assertNotIn(u"<target>", fileobj.read())
+
+    def test_pseudolocalized_xliff_is_idempotent(self):
+        # Pseudo-localizing the output again replaces the targets with the same strings.
+        first_file = os.path.join(self.temp_dir, "first.xlf")
+        second_file = os.path.join(self.temp_dir, "second.xlf")
+        self.xlifffileutil.pseudolocalizefile("./testdata/xliff/messages.xlf", first_file)
+        self.xlifffileutil.pseudolocalizefile(first_file, second_file)
+        self.assertTrue(filecmp.cmp(first_file, second_file))
+
+    def test_output_encoding(self):
+        generated_file = os.path.join(self.temp_dir, "messages.xlf")
+        self.xlifffileutil.pseudolocalizefile("./testdata/xliff/messages20.xlf", generated_file,
+                                              output_encoding="ISO-8859-1")
+        with io.open(generated_file, mode="r", encoding="ISO-8859-1") as fileobj:
+            data = fileobj.read()
+        self.assertTrue(data.startswith(u'<?xml version="1.0" encoding="ISO-8859-1"?>'))
+        self.assertIn(u"<target>&#10214;&#542;", data)
+
+    def test_malformed_xliff(self):
+        input_file = os.path.join(self.temp_dir, "malformed.xlf")
+        with io.open(input_file, mode="w", encoding="UTF-8") as fileobj:
+            fileobj.write(u'<xliff version="1.2"><file><body><trans-unit id="1"><source>Oops</trans-unit>')
+        self.assertRaises(ValueError, self.xlifffileutil.pseudolocalizefile, input_file,
+                          os.path.join(self.temp_dir, "output.xlf"))
+
+    def test_overwrite_existing(self):
+        generated_file = os.path.join(self.temp_dir, "messages.xlf")
+        self.xlifffileutil.pseudolocalizefile("./testdata/xliff/messages.xlf", generated_file)
+        self.assertRaises(IOError, self.xlifffileutil.pseudolocalizefile, "./testdata/xliff/messages.xlf",
+                          generated_file, overwrite_existing=False)
+
+
+class TestPseudoTranslations(unittest.TestCase):
+
+    def setUp(self):
+        self.util = PseudoL10nUtil()
+        self.translations = PseudoTranslations(cache_size=100)
+
+    def test_gettext(self):
+        self.assertEqual(self.util.pseudolocalize(u"Hello {0}!"), self.translations.gettext(u"Hello {0}!"))
+        self.assertEqual(self.util.pseudolocalize(u"Open"), self.translations.pgettext(u"menu", u"Open"))
+
+    def test_ngettext(self):
+        self.assertEqual(self.util.pseudolocalize(u"%d file"), self.translations.ngettext(u"%d file", u"%d files", 1))
+        self.assertEqual(self.util.pseudolocalize(u"%d files"), self.translations.ngettext(u"%d file", u"%d files", 2))
+        self.assertEqual(self.util.pseudolocalize(u"%d files"),
+                         self.translations.npgettext(u"folder", u"%d file", u"%d files", 0))
+
+    def test_cached(self):
+        self.translations.gettext(u"OK")
+        self.translations.gettext(u"OK")
+        info = self.translations.l10nutil.cache_info()
+        self.assertEqual((1, 1), (info.hits, info.misses))
+
+    def test_warm(self):
+        self.assertEqual(6, self.translations.warm("./testdata/locales/grammar.pot"))
+        misses = self.translations.l10nutil.cache_info().misses
+        self.translations.ngettext(u"%(count)d file", u"%(count)d files", 3)
+        self.assertEqual(misses, self.translations.l10nutil.cache_info().misses)
+
+    def test_install(self):
+        self.translations.install()
+        try:
+            self.assertEqual(self.util.pseudolocalize(u"Hello {0}!"), _(u"Hello {0}!"))  # noqa: F821
+        finally:
+            del six.moves.builtins.__dict__["_"]
+
+    def test_threads(self):
+        messages = [u"Message {0} of %s".format(idx) for idx in range(200)]
+        expected = [self.util.pseudolocalize(message) for message in messages]
+        results = [None] * 8
+
+        def worker(idx):
+            results[idx] = [self.translations.gettext(message) for message in messages]
+        threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(len(results))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([expected] * len(results), results)
+        self.assertEqual(100, self.translations.l10nutil.cache_info().currsize)
+
 
 class TestPseudoL10nUtil(unittest.TestCase):
 
@@ -115,6 +597,362 @@ class TestPseudoL10nUtil(unittest.TestCase):
         self.util.transforms = [pseudol10nutil.transforms.pad_length]
         self.assertEqual(expected, self.util.pseudolocalize(self.test_data))
 
+    def test_transform_names(self):
+        self.util.transforms = ["diacritic", "pad", "square"]
+        self.assertEqual(PseudoL10nUtil().pseudolocalize(self.test_data), self.util.pseudolocalize(self.test_data))
+        self.assertIs(self.util.compile(), self.util.compile())
+        self.util.transforms = ["fullwidth", pseudol10nutil.transforms.curly_brackets]
+        self.assertEqual(u"❴ＯＫ❵", self.util.pseudolocalize(u"OK"))
+        self.util.transforms = ["bogus"]
+        self.assertRaises(ValueError, self.util.pseudolocalize, u"OK")
+
+    def test_register_transform(self):
+        pseudol10nutil.transforms.register("test_upper", lambda s: s.upper())
+        try:
+            self.assertIn("test_upper", pseudol10nutil.transforms.names())
+            self.util.transforms = ["test_upper", "square"]
+            self.assertEqual(u"⟦OK⟧", self.util.pseudolocalize(u"ok"))
+        finally:
+            del pseudol10nutil.transforms._registry["test_upper"]
+        self.assertRaises(TypeError, pseudol10nutil.transforms.register, "bogus", None)
+
+    def test_placeholder_grammars(self):
+        self.util.transforms = ["diacritic"]
+        self.util.placeholder_grammars = ["jinja", "icu", "html", "shell", "printf"]
+        self.assertEqual(u"Ȟı {{ name }}, {% if x %}ÿøü{% endif %}",
+                         self.util.pseudolocalize(u"Hi {{ name }}, {% if x %}you{% endif %}"))
+        icu = u"{count, plural, one {# file} other {# files}}"
+        self.assertEqual(u"Ǩêêƥ " + icu, self.util.pseudolocalize(u"Keep " + icu))
+        self.assertEqual(u'Ċĺıċǩ <a href="x">ȟêȓê</a> &amp; ${HOME} $USER',
+                         self.util.pseudolocalize(u'Click <a href="x">here</a> &amp; ${HOME} $USER'))
+        self.assertEqual(u"%1$s øƒ %2$d", self.util.pseudolocalize(u"%1$s of %2$d"))
+        self.util.placeholder_grammars = []
+        self.assertEqual(u"{ñàɱê}", self.util.pseudolocalize(u"{name}"))
+        self.util.placeholder_grammars = None
+        self.assertEqual(u"{name}", self.util.pseudolocalize(u"{name}"))
+        self.assertRaises(ValueError, PseudoL10nUtil(placeholder_grammars=["bogus"]).pseudolocalize, u"OK")
+
+    def test_placeholder_grammars_default(self):
+        self.assertEqual(pseudol10nutil.placeholders.compile_matcher(),
+                         pseudol10nutil.placeholders.compile_matcher(["python-format", "printf"]))
+        self.assertEqual(CompiledPipeline(["diacritic"]).fingerprint(),
+                         CompiledPipeline(["diacritic"],
+                                          placeholder_grammars=["python-format", "printf"]).fingerprint())
+        self.assertNotEqual(CompiledPipeline(["diacritic"]).fingerprint(),
+                            CompiledPipeline(["diacritic"], placeholder_grammars=["jinja"]).fingerprint())
+
+    def test_placeholder_grammars_none_enabled(self):
+        matcher = pseudol10nutil.placeholders.compile_matcher([])
+        self.assertIsNone(matcher.match(u""))
+        self.assertEqual([u"{name} %s"], matcher.split(u"{name} %s"))
+
+    def test_register_placeholder_grammar(self):
+        pseudol10nutil.placeholders.register("test_colon", r":\w+")
+        try:
+            self.assertIn("test_colon", pseudol10nutil.placeholders.names())
+            util = PseudoL10nUtil(["fullwidth"], placeholder_grammars=["test_colon", "python-format"])
+            self.assertEqual(u"ＨＩ :name {0}", util.pseudolocalize(u"HI :name {0}"))
+            util = pickle.loads(pickle.dumps(util))
+            self.assertEqual(u"ＨＩ :name {0}", util.pseudolocalize(u"HI :name {0}"))
+        finally:
+            del pseudol10nutil.placeholders._registry["test_colon"]
+        self.assertRaises(TypeError, pseudol10nutil.placeholders.register, "bogus", None)
+        self.assertRaises(ValueError, pseudol10nutil.placeholders.register, "bogus", r"(\w+)")
+        self.assertRaises(ValueError, pseudol10nutil.placeholders.register, "bogus", r"[")
+
+    @unittest.skipIf(sys.version_info < (3, 7), "Lazy module attributes need Python 3.7+")
+    def test_lazy_import(self):
+        code = "import sys, pseudol10nutil; print(sorted(m for m in sys.modules if m.startswith('pseudol10nutil')))"
+        output = subprocess.check_output([sys.executable, "-c", code]).decode("ascii")
+        self.assertEqual("['pseudol10nutil']", output.strip())
+        code = "import sys, pseudol10nutil; pseudol10nutil.PseudoL10nUtil; print('multiprocessing' in sys.modules)"
+        output = subprocess.check_output([sys.executable, "-c", code]).decode("ascii")
+        self.assertEqual("False", output.strip())
+
+    def test_pad_length_buckets(self):
+        for length, target in [(0, 0), (1, 3), (10, 30), (11, 22), (20, 40), (21, 38), (70, 98), (71, 93), (1000, 1300)]:
+            self.assertEqual(target, len(pseudol10nutil.transforms.pad_length(u"x" * length)))
+
+    def test_expansion_policy(self):
+        policy = pseudol10nutil.transforms.ExpansionPolicy(ratios=[(5, 2)], long_ratio=1.5, cap=3, padding=u"*")
+        self.assertEqual(u"ab**", policy(u"ab"))
+        self.assertEqual(u"abcdef***", policy(u"abcdef"))
+        self.assertEqual(u"x" * 100 + u"***", policy(u"x" * 100))
+        self.util.transforms = [policy, pseudol10nutil.transforms.square_brackets]
+        self.assertEqual(u"⟦OK**⟧", self.util.pseudolocalize(u"OK"))
+
+    def test_expansion_policy_default(self):
+        policy = pseudol10nutil.transforms.ExpansionPolicy()
+        for length in [1, 10, 11, 70, 71, 5000]:
+            s = u"x" * length
+            self.assertEqual(pseudol10nutil.transforms.pad_length(s), policy(s))
+        self.assertRaises(ValueError, pseudol10nutil.transforms.ExpansionPolicy, padding=u"")
+
+    def test_expansion_policy_fingerprint(self):
+        make = pseudol10nutil.transforms.ExpansionPolicy
+        self.assertEqual(make(cap=5), make(cap=5))
+        self.assertEqual(repr(make(cap=5)), repr(make(cap=5)))
+        self.assertEqual(CompiledPipeline([make(cap=5)]).fingerprint(), CompiledPipeline([make(cap=5)]).fingerprint())
+        self.assertNotEqual(CompiledPipeline([make(cap=5)]).fingerprint(), CompiledPipeline([make()]).fingerprint())
+
+    def test_pseudolocalize_many(self):
+        strings = [u"OK", u"Cancel", u"%s items", u"OK", u"", u"Cancel"]
+        expected = [self.util.pseudolocalize(s) for s in strings]
+        self.assertEqual(expected, self.util.pseudolocalize_many(strings))
+        self.assertEqual(expected, self.util.pseudolocalize_many(s for s in strings))
+        mapping = {"ok": u"OK", "cancel": u"Cancel", "items": u"%s items"}
+        expected = dict((k, self.util.pseudolocalize(v)) for k, v in mapping.items())
+        self.assertEqual(expected, self.util.pseudolocalize_many(mapping))
+
+    def test_pseudolocalize_many_deduplicates(self):
+        calls = []
+
+        def counting(s):
+            calls.append(s)
+            return s
+
+        self.util.transforms = [counting]
+        self.util.pseudolocalize_many([u"OK", u"Cancel", u"OK", u"OK"])
+        self.assertEqual([u"OK", u"Cancel"], calls)
+
+
+class TestCompiledPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.util = PseudoL10nUtil()
+        self.test_data = u"The quick brown fox jumps over the lazy dog"
+
+    def test_compile(self):
+        pipeline = self.util.compile()
+        self.assertIsInstance(pipeline, CompiledPipeline)
+        self.assertIs(pipeline, self.util.compile())
+        self.assertEqual(self.util.pseudolocalize(self.test_data), pipeline(self.test_data))
+
+    def test_tokenize(self):
+        pipeline = self.util.compile()
+        tokens = pipeline.tokenize(u"%(count)d files in {folder}")
+        self.assertEqual((u"", u"%(count)d", u" files in ", u"{folder}", u""), tokens)
+        self.assertIs(tokens, pipeline.tokenize(u"%(count)d files in {folder}"))
+        self.assertEqual((self.test_data,), pipeline.tokenize(self.test_data))
+        self.assertEqual(pipeline(u"%(count)d files in {folder}"), pipeline.render(tokens))
+
+    def test_template_cache_size(self):
+        pipeline = CompiledPipeline(self.util.transforms, template_cache_size=2)
+        for s in [u"%s one", u"%s two", u"%s three"]:
+            self.assertEqual(self.util.pseudolocalize(s), pipeline(s))
+        self.assertTrue(len(pipeline._templates) <= 2)
+        pipeline = CompiledPipeline(self.util.transforms, template_cache_size=0)
+        self.assertEqual(self.util.pseudolocalize(u"%s one"), pipeline(u"%s one"))
+        self.assertEqual({}, pipeline._templates)
+
+    def test_recompile_on_change(self):
+        pipeline = self.util.compile()
+        self.util.transforms = [pseudol10nutil.transforms.curly_brackets]
+        self.assertIsNot(pipeline, self.util.compile())
+        self.assertEqual(u"❴The quick brown fox jumps over the lazy dog❵", self.util.pseudolocalize(self.test_data))
+
+    def test_fused_transforms(self):
+        xforms = [
+            pseudol10nutil.transforms.transliterate_fullwidth,
+            pseudol10nutil.transforms.transliterate_circled,
+            pseudol10nutil.transforms.angle_brackets,
+            pseudol10nutil.transforms.square_brackets,
+            ]
+        pipeline = CompiledPipeline(xforms)
+        expected = self.test_data
+        for munge in xforms:
+            expected = munge(expected)
+        self.assertEqual(expected, pipeline(self.test_data))
+        expected = u"⟦《Ｓｏｕｒｃｅ {0} ｒｅｔｕｒｎｅｄ %d ｒｏｗｓ.》⟧"
+        self.assertEqual(expected, pipeline(u"Source {0} returned %d rows."))
+
+    def test_immutable(self):
+        pipeline = self.util.compile()
+        self.assertRaises(AttributeError, setattr, pipeline, "transforms", ())
+        self.assertRaises(AttributeError, setattr, pipeline, "bogus", 1)
+        self.assertRaises(AttributeError, delattr, pipeline, "observer")
+        self.assertFalse(hasattr(pipeline, "__dict__"))
+
+    def test_hashable(self):
+        pipeline = CompiledPipeline(["diacritic", "pad", "square"])
+        self.assertEqual(pipeline, self.util.compile())
+        self.assertEqual(hash(pipeline), hash(self.util.compile()))
+        self.assertNotEqual(pipeline, CompiledPipeline(["diacritic", "square"]))
+        self.assertNotEqual(pipeline, CompiledPipeline(["diacritic", "pad", "square"], placeholder_grammars=["html"]))
+        self.assertNotEqual(pipeline, CompiledPipeline(["diacritic", "pad", "square"], observer=PipelineStats()))
+        self.assertEqual(1, len(set([pipeline, self.util.compile(), pickle.loads(pickle.dumps(pipeline))])))
+
+    def test_pickle_observer(self):
+        pipeline = CompiledPipeline(["diacritic", "pad", "square"], observer=PipelineStats(),
+                                    placeholder_grammars=["jinja"])
+        unpickled = pickle.loads(pickle.dumps(pipeline))
+        self.assertIsNone(unpickled.observer)
+        self.assertEqual(pipeline.transforms, unpickled.transforms)
+        self.assertEqual(("jinja",), unpickled.placeholder_grammars)
+        self.assertEqual(pipeline(self.test_data), unpickled(self.test_data))
+
+    def test_with_transforms(self):
+        stats = PipelineStats()
+        pipeline = CompiledPipeline(["diacritic"], observer=stats, template_cache_size=8,
+                                    placeholder_grammars=["jinja"])
+        fullwidth = pipeline.with_transforms(["fullwidth", "curly"])
+        self.assertEqual((pseudol10nutil.transforms.transliterate_diacritic,), pipeline.transforms)
+        self.assertEqual(u"❴ＯＫ {{ x }}❵", fullwidth(u"OK {{ x }}"))
+        self.assertIs(stats, fullwidth.observer)
+        self.assertEqual(8, fullwidth.template_cache_size)
+        self.assertEqual(("jinja",), fullwidth.placeholder_grammars)
+
+    def test_shared_across_threads(self):
+        pipeline = CompiledPipeline(["diacritic", "pad", "square"], template_cache_size=16)
+        strings = [u"String {0} number %d".format(idx) for idx in range(200)]
+        expected = [PseudoL10nUtil().pseudolocalize(s) for s in strings]
+        results = []
+
+        def run():
+            results.append([pipeline(s) for s in strings])
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([expected] * 8, results)
+
+
+@unittest.skipUnless(pseudol10nutil.vectorized.available(), "numpy is not installed")
+class TestVectorized(unittest.TestCase):
+
+    def setUp(self):
+        self.strings = [u"Hello {0}!", u"", None, u"%(count)d files\nin %s", u"Tab\t{", u"\U0001F600 Smile", u"100%"]
+
+    def test_transliterate_many(self):
+        table = pseudol10nutil.transforms._CIRCLED_TABLE
+        strings = [u"abc 123", u"{abc} %s", u""]
+        self.assertEqual([s.translate(table) for s in strings],
+                         pseudol10nutil.vectorized.transliterate_many(strings, table, protect_placeholders=False))
+        self.assertEqual([u"ⓐⓑⓒ ①②③", u"{abc} %s", u""],
+                         pseudol10nutil.vectorized.transliterate_many(strings, table))
+
+    def test_pseudolocalize_many(self):
+        for transforms_list in [None, ["fullwidth", "circled", "pad", "curly"], ["pad", "square"], [],
+                                ["square", "diacritic"]]:
+            pipeline = PseudoL10nUtil(transforms_list).compile()
+            self.assertEqual([pipeline(s) for s in self.strings],
+                             pseudol10nutil.vectorized.pseudolocalize_many(pipeline, self.strings))
+
+    def test_placeholder_grammars(self):
+        # HTML tags can span lines, so a tag must not run from one string of the batch into the next.
+        strings = [u"Line <b", u"bold> {0}", u"<i>x</i>\n<br\n/>", u"{{ a }}"]
+        for grammars in [["html"], ["jinja", "html", "printf"], []]:
+            pipeline = PseudoL10nUtil(placeholder_grammars=grammars).compile()
+            self.assertEqual([pipeline(s) for s in strings],
+                             pseudol10nutil.vectorized.pseudolocalize_many(pipeline, strings))
+
+    def test_batches(self):
+        pipeline = PseudoL10nUtil().compile()
+        strings = [u"String {0} number %d".format(idx) for idx in range(100)]
+        batch_chars = pseudol10nutil.vectorized._batch_chars
+        pseudol10nutil.vectorized._batch_chars = 100
+        try:
+            self.assertEqual([pipeline(s) for s in strings],
+                             pseudol10nutil.vectorized.pseudolocalize_many(pipeline, strings))
+        finally:
+            pseudol10nutil.vectorized._batch_chars = batch_chars
+
+    def test_type_error(self):
+        self.assertRaises(TypeError, pseudol10nutil.vectorized.pseudolocalize_many, PseudoL10nUtil().compile(),
+                          [u"OK", b"Cancel"])
+
+
+class TestPseudoL10nUtilCache(unittest.TestCase):
+
+    def setUp(self):
+        self.util = PseudoL10nUtil(cache_size=2)
+
+    def test_cache_disabled_by_default(self):
+        self.assertIsNone(PseudoL10nUtil().cache_info())
+
+    def test_cache_hits_and_misses(self):
+        expected = PseudoL10nUtil().pseudolocalize(u"OK")
+        self.assertEqual(expected, self.util.pseudolocalize(u"OK"))
+        self.assertEqual(expected, self.util.pseudolocalize(u"OK"))
+        info = self.util.cache_info()
+        self.assertEqual((1, 1, 0, 2, 1), info)
+
+    def test_cache_eviction(self):
+        for s in [u"OK", u"Cancel", u"OK", u"Retry", u"Cancel"]:
+            self.util.pseudolocalize(s)
+        info = self.util.cache_info()
+        self.assertEqual(1, info.hits)
+        self.assertEqual(4, info.misses)
+        self.assertEqual(2, info.evictions)
+        self.assertEqual(2, info.currsize)
+
+    def test_cache_cleared_on_transforms_change(self):
+        self.util.pseudolocalize(u"OK")
+        self.util.transforms = [pseudol10nutil.transforms.curly_brackets]
+        self.assertEqual(0, self.util.cache_info().currsize)
+        self.assertEqual(u"❴OK❵", self.util.pseudolocalize(u"OK"))
+        self.util.transforms.append(pseudol10nutil.transforms.square_brackets)
+        self.assertEqual(u"⟦❴OK❵⟧", self.util.pseudolocalize(u"OK"))
+
+    def test_cache_clear(self):
+        self.util.pseudolocalize(u"OK")
+        self.util.cache_clear()
+        self.assertEqual((0, 0, 0, 2, 0), self.util.cache_info())
+
+
+class TestPipelineStats(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = PipelineStats()
+        self.util = PseudoL10nUtil(observer=self.stats)
+
+    def test_no_observer_by_default(self):
+        self.assertIsNone(PseudoL10nUtil().observer)
+        self.assertIsNone(PseudoL10nUtil().compile().observer)
+
+    def test_per_transform_counters(self):
+        expected = PseudoL10nUtil().pseudolocalize(u"Hello")
+        self.assertEqual(expected, self.util.pseudolocalize(u"Hello"))
+        snapshot = self.stats.snapshot()
+        self.assertEqual(set(["split", "transliterate_diacritic", "pad_length", "square_brackets"]), set(snapshot))
+        self.assertEqual((1, 5, 5), (snapshot["transliterate_diacritic"].calls,
+                                     snapshot["transliterate_diacritic"].chars_in,
+                                     snapshot["transliterate_diacritic"].chars_out))
+        self.assertEqual(5, snapshot["pad_length"].chars_in)
+        self.assertEqual(len(expected), snapshot["square_brackets"].chars_out)
+        self.assertTrue(all(stage.seconds >= 0.0 for stage in snapshot.values()))
+
+    def test_format_specifiers(self):
+        expected = PseudoL10nUtil().pseudolocalize(u"Hello {name}")
+        self.assertEqual(expected, self.util.pseudolocalize(u"Hello {name}"))
+        snapshot = self.stats.snapshot()
+        self.assertEqual(1, snapshot["join"].calls)
+        # The transliteration is applied to each literal section of the string.
+        self.assertEqual(2, snapshot["transliterate_diacritic"].calls)
+        self.assertEqual(1, snapshot["pad_length"].calls)
+
+    def test_fused_transforms(self):
+        self.util.transforms = [pseudol10nutil.transforms.transliterate_diacritic,
+                                pseudol10nutil.transforms.transliterate_circled,
+                                pseudol10nutil.transforms.angle_brackets,
+                                pseudol10nutil.transforms.square_brackets]
+        self.util.pseudolocalize(u"OK")
+        snapshot = self.stats.snapshot()
+        self.assertEqual(1, snapshot["transliterate_diacritic+transliterate_circled"].calls)
+        self.assertEqual(1, snapshot["angle_brackets+square_brackets"].calls)
+
+    def test_reset(self):
+        self.util.pseudolocalize(u"OK")
+        self.stats.reset()
+        self.assertEqual({}, self.stats.snapshot())
+
+    def test_observer_change(self):
+        self.util.observer = None
+        self.util.pseudolocalize(u"OK")
+        self.assertEqual({}, self.stats.snapshot())
+
 
 if __name__ == "__main__":
     unittest.main()